@@ -1,18 +1,51 @@
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify, request
 from app.config import Config
+from app.database import Database
+from app.json_provider import JSONProvider
+from app.metrics import metrics
+from app.profiling import tracer
 from app.routes import api_bp
 import os
+import time
 
 def create_app():
     """Application factory pattern"""
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = JSONProvider(app)
 
     # Cache directory
     os.makedirs('cache', exist_ok=True)
 
     # Register blueprints
     app.register_blueprint(api_bp)
+    
+    # Create the pool without connecting; warm-up runs in the background
+    Database.initialize_pool()
+    
+    # Per-request latency, spans and slow-request log; each worker
+    # flushes its metrics for /metrics
+    metrics.start_flusher()
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        tracer.begin()
+
+    @app.after_request
+    def record_latency(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.observe(
+                'http_request_duration_seconds', elapsed,
+                endpoint=endpoint,
+                method=request.method,
+                status=str(response.status_code)
+            )
+            tracer.end(request.method, request.full_path.rstrip('?'), endpoint, response.status_code, elapsed)
+        return response
 
     # Handling global errors
     @app.errorhandler(404)
@@ -0,0 +1,117 @@
+import gzip
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content codings for cached bodies, in server preference order
+COMPRESSORS = {'gzip': lambda data: gzip.compress(data, Config.GZIP_LEVEL, mtime=0)}
+if brotli is not None:
+    COMPRESSORS = {'br': lambda data: brotli.compress(data, quality=Config.BROTLI_QUALITY), **COMPRESSORS}
+
+class ResultCache:
+    """Bounded LRU cache for query results, tagged with a data generation"""
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size if max_size is not None else Config.RESULT_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else Config.RESULT_CACHE_TTL
+        self.generation = 0
+        self.data_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """Return cached value for key, calling loader() on a miss"""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                generation, stored_at, value = entry
+                # Entries from an older generation or past their TTL are stale
+                if generation == self.generation and now - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            generation = self.generation
+
+        value = loader()
+
+        with self._lock:
+            # Only store if no write happened while we were loading
+            if generation == self.generation and self.max_size > 0:
+                self._entries[key] = (generation, now, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return value
+
+    def bump_generation(self):
+        """Invalidate all cached results after a write"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            return self.generation
+
+    def observe_version(self, version):
+        """
+        Invalidate if the shared data version moved.
+
+        Writes in other workers only show up through the version stored in
+        the database, so readers that have fetched it report it here.
+        """
+        with self._lock:
+            if version == self.data_version:
+                return
+            self.data_version = version
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """Get cache counters"""
+        with self._lock:
+            return {
+                "generation": self.generation,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+class EncodedBody:
+    """A serialized response body; compressed variants are built on first use"""
+
+    def __init__(self, data):
+        self.data = data
+        self._variants = {}
+
+    def encoded(self, coding=None):
+        """The body in a content coding from COMPRESSORS (None for identity)"""
+        if coding is None:
+            return self.data
+        variant = self._variants.get(coding)
+        if variant is None:
+            # Two threads may both compress once; either result is identical
+            variant = self._variants[coding] = COMPRESSORS[coding](self.data)
+        return variant
+
+
+# Shared cache for country reads
+result_cache = ResultCache()
+
+# Serialized JSON responses, keyed by ETag
+response_cache = ResultCache(Config.RESPONSE_CACHE_SIZE, Config.RESPONSE_CACHE_TTL)
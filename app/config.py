@@ -21,10 +21,20 @@ class Config:
         'password': os.getenv('DB_PASSWORD', ''),
         'charset': 'utf8mb4',
         'autocommit': True,
-        'pool_size': 10,
-        'pool_name': 'country_pool'
+        'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+        # Pure-Python driver: its sockets become cooperative under gevent (run_async.py)
+        'use_pure': os.getenv('DB_USE_PURE', 'false').lower() in ('1', 'true', 'yes'),
+        # Pool: size, connections pre-opened in the background at startup,
+        # max seconds to wait for a free connection, idle seconds before a ping
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'pool_warmup': int(os.getenv('DB_POOL_WARMUP', 2)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+        'ping_after': float(os.getenv('DB_POOL_PING_AFTER', 30))
     }
     
+    # Schema files applied by POST /init-db
+    MIGRATIONS_DIR = os.path.join(BASE_DIR, 'migrations')
+    
     # External APIs
     COUNTRIES_API_URL = os.getenv(
         'COUNTRIES_API_URL',
@@ -37,6 +47,101 @@ class Config:
     
     # API Settings
     API_TIMEOUT = int(os.getenv('API_TIMEOUT', 30))
+    COUNTRIES_API_TIMEOUT = float(os.getenv('COUNTRIES_API_TIMEOUT', API_TIMEOUT))
+    EXCHANGE_API_TIMEOUT = float(os.getenv('EXCHANGE_API_TIMEOUT', API_TIMEOUT))
+    API_RETRIES = int(os.getenv('API_RETRIES', 2))
+    API_BACKOFF = float(os.getenv('API_BACKOFF', 0.5))
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 4))
+    
+    # Upstream payload snapshots (conditional requests / offline refresh)
+    SNAPSHOT_DIR = os.path.join(BASE_DIR, 'cache', 'snapshots')
+    OFFLINE_REFRESH = os.getenv('OFFLINE_REFRESH', 'false').lower() in ('1', 'true', 'yes')
+    
+    # GDP multiplier seed - each country's multiplier is fixed by the seed and
+    # its name, so refreshes only rewrite countries whose data changed.
+    # GDP_SEED=random draws new multipliers per refresh, which changes (and
+    # rewrites) every row with a currency each time
+    GDP_SEED = None if (os.getenv('GDP_SEED') or '0').lower() == 'random' else int(os.getenv('GDP_SEED') or 0)
+    
+    # Refresh writes
+    UPSERT_CHUNK_SIZE = int(os.getenv('UPSERT_CHUNK_SIZE', 500))
+    
+    # Refresh jobs - records and locks are shared by all workers on a host
+    JOBS_DIR = os.path.join(BASE_DIR, 'cache', 'jobs')
+    JOB_RETENTION = int(os.getenv('JOB_RETENTION', 86400))
+    REFRESH_ASYNC = os.getenv('REFRESH_ASYNC', 'false').lower() in ('1', 'true', 'yes')
+    # Longest a synchronous refresh request waits before answering 202 with the job
+    REFRESH_WAIT_TIMEOUT = float(os.getenv('REFRESH_WAIT_TIMEOUT', 300))
+    
+    # Pagination
+    DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 1000))
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 200))
+    
+    # Result cache - TTL bounds staleness across gunicorn workers,
+    # since each worker only sees its own generation bumps
+    RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 256))
+    RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 30))
+    
+    # HTTP caching - ETags follow the data version in refresh_metadata
+    DATA_VERSION_TTL = float(os.getenv('DATA_VERSION_TTL', 1))
+    CACHE_CONTROL = os.getenv('CACHE_CONTROL', 'no-cache')
+    
+    # Response cache - serialized JSON bodies keyed by ETag, compressed
+    # (gzip, and br if the brotli module is installed) on first request
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 64))
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 300))
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+    BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+    
+    # Dataset file - published at refresh/delete, memory-mapped by every
+    # worker; reads fall back to MySQL when it is missing or disabled
+    DATASET_PATH = os.path.join(BASE_DIR, 'cache', 'countries.dataset')
+    DATASET_ENABLED = os.getenv('DATASET_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Cross-rate matrix for /convert - rebuilt from the full rate table at refresh
+    RATES_PATH = os.path.join(BASE_DIR, 'cache', 'rates.npz')
+    MAX_CONVERSIONS = int(os.getenv('MAX_CONVERSIONS', 10000))
+    
+    # Bulk exports - written once per data version, served with Range support
+    EXPORT_DIR = os.path.join(BASE_DIR, 'cache', 'exports')
+    
+    # GET /search - typeahead over names and capitals
+    DEFAULT_SEARCH_LIMIT = int(os.getenv('DEFAULT_SEARCH_LIMIT', 10))
+    MAX_SEARCH_LIMIT = int(os.getenv('MAX_SEARCH_LIMIT', 50))
+    
+    # History endpoints - default window and most points per response
+    HISTORY_DEFAULT_DAYS = int(os.getenv('HISTORY_DEFAULT_DAYS', 30))
+    HISTORY_MAX_POINTS = int(os.getenv('HISTORY_MAX_POINTS', 5000))
+    
+    # POST /countries/lookup - most names (and currency codes) per request
+    MAX_LOOKUP_ITEMS = int(os.getenv('MAX_LOOKUP_ITEMS', 500))
+    
+    # Precomputed /stats aggregates - longest top-N GDP list kept per group
+    SUMMARY_TOP_N = int(os.getenv('SUMMARY_TOP_N', 10))
+    
+    # Metrics - each worker flushes a snapshot here; /metrics sums them
+    METRICS_DIR = os.path.join(BASE_DIR, 'cache', 'metrics')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+    METRICS_RETENTION = int(os.getenv('METRICS_RETENTION', 86400))
+    
+    # Profiling - per-request spans, slow-request log (0 = off) and the
+    # admin sampling profiler, which needs ADMIN_TOKEN to be set
+    TRACE_ENABLED = os.getenv('TRACE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    TRACE_MAX_SPANS = int(os.getenv('TRACE_MAX_SPANS', 200))
+    SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 0))
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+    PROFILE_DIR = os.path.join(BASE_DIR, 'cache', 'profiles')
+    PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 60))
+    PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 10))
     
     # Image settings - use absolute path
-    IMAGE_PATH = os.path.join(BASE_DIR, 'cache', 'summary.png')
\ No newline at end of file
+    IMAGE_PATH = os.path.join(BASE_DIR, 'cache', 'summary.png')
+    # Optional pre-rendered variants, e.g. IMAGE_VARIANT_WIDTHS=400,200 IMAGE_VARIANT_FORMATS=png,webp
+    IMAGE_VARIANT_WIDTHS = tuple(
+        int(width) for width in os.getenv('IMAGE_VARIANT_WIDTHS', '').split(',') if width.strip()
+    )
+    IMAGE_VARIANT_FORMATS = tuple(
+        fmt.strip().lower() for fmt in os.getenv('IMAGE_VARIANT_FORMATS', 'png').split(',') if fmt.strip()
+    )
\ No newline at end of file
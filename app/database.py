@@ -1,44 +1,240 @@
 import mysql.connector
-from mysql.connector import pooling
+from mysql.connector.errors import PoolError
 from app.config import Config
+from app.metrics import metrics
+from app.profiling import tracer
 from contextlib import contextmanager
+import os
+import queue
+import threading
+import time
+
+# Errors meaning an upgrade statement was already applied: duplicate column,
+# duplicate key name, can't drop a missing index
+ALREADY_APPLIED_ERRORS = (1060, 1061, 1091)
+
+# Statement kinds reported in query metrics; anything else is 'other'
+STATEMENT_KINDS = ('select', 'insert', 'update', 'delete')
+
+# Longest a checkout blocks on the idle queue before looking for a free slot
+POOL_POLL_INTERVAL = 0.05
+
+
+def _statement_kind(query):
+    """Leading keyword of a statement, for metric labels"""
+    keyword = query.lstrip().split(None, 1)[0].lower() if query.strip() else ''
+    return keyword if keyword in STATEMENT_KINDS else 'other'
+
+
+class _TimedCursor:
+    """
+    Cursor wrapper recording execute() latency by statement kind, and a
+    span with the row count when the request is traced
+    """
+    
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._span = None
+    
+    def execute(self, query, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        with tracer.span('db', query) as span:
+            try:
+                result = self._cursor.execute(query, params, *args, **kwargs)
+            finally:
+                metrics.observe(
+                    'db_query_duration_seconds', time.perf_counter() - started,
+                    kind=_statement_kind(query)
+                )
+            span.set(rows=self._cursor.rowcount)
+        self._span = span
+        return result
+    
+    def executemany(self, query, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        with tracer.span('db', query) as span:
+            try:
+                result = self._cursor.executemany(query, seq_params, *args, **kwargs)
+            finally:
+                metrics.observe(
+                    'db_query_duration_seconds', time.perf_counter() - started,
+                    kind=_statement_kind(query)
+                )
+            span.set(rows=self._cursor.rowcount)
+        self._span = span
+        return result
+    
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if self._span is not None:
+            # Unbuffered SELECTs only know their row count once fetched
+            self._span.set(rows=len(rows))
+        return rows
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        return iter(self._cursor)
+
 
 class Database:
-    """Database connection pool manager"""
+    """
+    Database connection pool manager.
+    
+    Connections are opened lazily on first use (optionally pre-opened by a
+    background warm-up), checkouts wait at most DB_POOL_TIMEOUT seconds,
+    and connections idle for longer than DB_POOL_PING_AFTER are pinged
+    before being handed out.
+    """
     
     _pool = None
+    _created = 0
+    _lock = threading.Lock()
     
     @classmethod
     def initialize_pool(cls):
-        """Initialize connection pool"""
-        if cls._pool is None:
+        """Initialize the (empty) connection pool and start warm-up"""
+        with cls._lock:
+            if cls._pool is not None:
+                return
+            # Idle connections as (connection, last_used); LIFO keeps the
+            # warmest connections in use and lets the rest go idle
+            cls._pool = queue.LifoQueue()
+            cls._created = 0
+        
+        warmup = min(Config.DB_CONFIG['pool_warmup'], Config.DB_CONFIG['pool_size'])
+        if warmup > 0:
+            threading.Thread(
+                target=cls._warm_up, args=(warmup,), name='db-warmup', daemon=True
+            ).start()
+        print("Database connection pool initialized")
+    
+    @classmethod
+    def _connect(cls):
+        """Open a new MySQL connection"""
+        return mysql.connector.connect(
+            host=Config.DB_CONFIG['host'],
+            port=Config.DB_CONFIG['port'],
+            database=Config.DB_CONFIG['database'],
+            user=Config.DB_CONFIG['user'],
+            password=Config.DB_CONFIG['password'],
+            charset=Config.DB_CONFIG['charset'],
+            autocommit=Config.DB_CONFIG['autocommit'],
+            connection_timeout=Config.DB_CONFIG['connect_timeout'],
+            use_pure=Config.DB_CONFIG['use_pure']
+        )
+    
+    @classmethod
+    def _reserve_slot(cls):
+        """Claim room for one more connection, if the pool isn't full"""
+        with cls._lock:
+            if cls._created >= Config.DB_CONFIG['pool_size']:
+                return False
+            cls._created += 1
+            return True
+    
+    @classmethod
+    def _release_slot(cls):
+        """Give back a slot claimed by _reserve_slot"""
+        with cls._lock:
+            cls._created -= 1
+    
+    @classmethod
+    def _open(cls):
+        """Open a connection for a reserved slot"""
+        try:
+            return cls._connect()
+        except Exception:
+            cls._release_slot()
+            raise
+    
+    @classmethod
+    def _warm_up(cls, count):
+        """Pre-open up to count connections in the background"""
+        for _ in range(count):
+            if not cls._reserve_slot():
+                return
             try:
-                cls._pool = pooling.MySQLConnectionPool(
-                    pool_name=Config.DB_CONFIG['pool_name'],
-                    pool_size=Config.DB_CONFIG['pool_size'],
-                    host=Config.DB_CONFIG['host'],
-                    port=Config.DB_CONFIG['port'],
-                    database=Config.DB_CONFIG['database'],
-                    user=Config.DB_CONFIG['user'],
-                    password=Config.DB_CONFIG['password'],
-                    charset=Config.DB_CONFIG['charset'],
-                    autocommit=Config.DB_CONFIG['autocommit']
-                )
-                print("Database connection pool initialized")
+                cls._pool.put((cls._open(), time.monotonic()))
             except mysql.connector.Error as e:
-                print(f"Error initializing database pool: {e}")
-                raise
+                print(f"Database warm-up stopped: {e}")
+                return
     
     @classmethod
-    @contextmanager
-    def get_connection(cls):
-        """Context manager for database connections"""
+    def _is_healthy(cls, connection, last_used):
+        """Ping connections that sat idle long enough to have gone stale"""
+        if time.monotonic() - last_used < Config.DB_CONFIG['ping_after']:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+    
+    @classmethod
+    def _discard(cls, connection):
+        """Drop a connection and free its slot"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        cls._release_slot()
+    
+    @classmethod
+    def _acquire(cls):
+        """Check out a connection, waiting at most DB_POOL_TIMEOUT seconds"""
         if cls._pool is None:
             cls.initialize_pool()
         
+        started = time.monotonic()
+        deadline = started + Config.DB_CONFIG['pool_timeout']
+        while True:
+            try:
+                connection, last_used = cls._pool.get_nowait()
+            except queue.Empty:
+                if cls._reserve_slot():
+                    connection = cls._open()
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.inc('db_pool_exhausted_total')
+                    raise PoolError("Connection pool exhausted")
+                # A slot freed by _discard puts nothing on the queue, so
+                # wait in short steps and retry _reserve_slot between them
+                try:
+                    connection, last_used = cls._pool.get(timeout=min(remaining, POOL_POLL_INTERVAL))
+                except queue.Empty:
+                    continue
+            
+            if cls._is_healthy(connection, last_used):
+                break
+            cls._discard(connection)
+        
+        metrics.observe('db_pool_wait_seconds', time.monotonic() - started)
+        return connection
+    
+    @classmethod
+    def _return(cls, connection):
+        """Give a connection back to the pool, or drop it if it broke"""
+        try:
+            usable = connection.is_connected()
+        except Exception:
+            usable = False
+        
+        if usable:
+            cls._pool.put((connection, time.monotonic()))
+        else:
+            cls._discard(connection)
+    
+    @classmethod
+    @contextmanager
+    def get_connection(cls):
+        """Context manager for database connections"""
         connection = None
         try:
-            connection = cls._pool.get_connection()
+            connection = cls._acquire()
             yield connection
         except mysql.connector.Error as e:
             print(f"Database error: {e}")
@@ -46,15 +242,57 @@ class Database:
                 connection.rollback()
             raise
         finally:
-            if connection and connection.is_connected():
-                connection.close()
+            if connection:
+                cls._return(connection)
     
     @classmethod
     @contextmanager
     def get_cursor(cls, dictionary=True):
         """Context manager for database cursor"""
         with cls.get_connection() as connection:
-            cursor = connection.cursor(dictionary=dictionary)
+            cursor = _TimedCursor(connection.cursor(dictionary=dictionary))
+            try:
+                yield cursor
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    @classmethod
+    def stream(cls, query, params=(), dictionary=True, batch_size=None):
+        """Generator yielding rows from an unbuffered cursor in batches"""
+        batch_size = batch_size or Config.STREAM_BATCH_SIZE
+        
+        with cls.get_connection() as connection:
+            cursor = _TimedCursor(connection.cursor(dictionary=dictionary, buffered=False))
+            finished = False
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+                finished = True
+            finally:
+                if not finished:
+                    # Client went away mid-stream: drop the unread result set
+                    # so the connection can go back to the pool
+                    try:
+                        connection.consume_results()
+                    except mysql.connector.Error:
+                        pass
+                cursor.close()
+    
+    @classmethod
+    @contextmanager
+    def transaction(cls, dictionary=True):
+        """Context manager for a cursor inside an explicit transaction"""
+        with cls.get_connection() as connection:
+            connection.start_transaction()
+            cursor = _TimedCursor(connection.cursor(dictionary=dictionary))
             try:
                 yield cursor
                 connection.commit()
@@ -64,5 +302,27 @@ class Database:
             finally:
                 cursor.close()
 
-# Initialize pool on module import
-Database.initialize_pool()
\ No newline at end of file
+    @staticmethod
+    def _read_statements(filename):
+        """Split a migrations/*.sql file into statements, dropping comments"""
+        with open(os.path.join(Config.MIGRATIONS_DIR, filename), 'r', encoding='utf-8') as f:
+            lines = [line for line in f if not line.strip().startswith('--')]
+        return [statement.strip() for statement in ''.join(lines).split(';') if statement.strip()]
+    
+    @classmethod
+    def apply_schema(cls):
+        """Apply migrations/schema.sql, then migrations/upgrades.sql"""
+        applied = 0
+        with cls.get_cursor() as cursor:
+            for statement in cls._read_statements('schema.sql'):
+                cursor.execute(statement)
+                applied += 1
+            
+            for statement in cls._read_statements('upgrades.sql'):
+                try:
+                    cursor.execute(statement)
+                    applied += 1
+                except mysql.connector.Error as e:
+                    if e.errno not in ALREADY_APPLIED_ERRORS:
+                        raise
+        return applied
\ No newline at end of file
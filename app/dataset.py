@@ -0,0 +1,289 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+import numpy as np
+from app.config import Config
+from app.utils.files import atomic_write
+
+# File layout: MAGIC, u32 header length, JSON header, then 8-byte aligned
+# little-endian arrays described by header['sections'] as [offset, dtype, length]
+MAGIC = b'CCDSET01'
+
+# Columns stored as (offset, length) pairs into the shared string table;
+# decimals are kept as their exact MySQL text
+STRING_COLUMNS = (
+    'name', 'capital', 'region', 'currency_code',
+    'exchange_rate', 'estimated_gdp', 'flag_url'
+)
+DECIMAL_COLUMNS = ('exchange_rate', 'estimated_gdp')
+INDEXED_COLUMNS = ('region', 'currency_code')
+
+NULL_TIMESTAMP = np.iinfo(np.int64).min
+EPOCH = datetime(1970, 1, 1)
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def write_dataset(path, rows, version, orders, summary=None, generation=None):
+    """
+    Write a dataset file atomically.
+
+    rows are country dicts ordered by id, version the (last_refreshed_at,
+    delete_count) they were read at, and orders maps each sort key to the
+    row ids in the database's ORDER BY order (so collation rules never have
+    to be reimplemented here). summary, if given, is stored in the header
+    as precomputed aggregates, and generation as the write counter from
+    refresh_metadata.
+    """
+    count = len(rows)
+    sections = {
+        'id': np.array([row['id'] for row in rows], dtype='<i8'),
+        'population': np.array([row['population'] for row in rows], dtype='<i8'),
+        'last_refreshed_at': np.array([
+            NULL_TIMESTAMP if row['last_refreshed_at'] is None
+            else (row['last_refreshed_at'] - EPOCH) // timedelta(microseconds=1)
+            for row in rows
+        ], dtype='<i8')
+    }
+
+    # String table: each distinct value stored once (regions, currencies repeat)
+    strings = bytearray()
+    interned = {}
+    for column in STRING_COLUMNS:
+        offsets = np.zeros(count, dtype='<u4')
+        lengths = np.full(count, -1, dtype='<i4')
+        for position, row in enumerate(rows):
+            if row[column] is None:
+                continue
+            text = str(row[column])
+            if text not in interned:
+                data = text.encode('utf-8')
+                interned[text] = (len(strings), len(data))
+                strings += data
+            offsets[position], lengths[position] = interned[text]
+        sections[f'{column}.offset'] = offsets
+        sections[f'{column}.length'] = lengths
+    sections['strings'] = np.frombuffer(bytes(strings), dtype=np.uint8)
+
+    position_of = {row['id']: position for position, row in enumerate(rows)}
+    for sort, ids in orders.items():
+        order = np.array([position_of[row_id] for row_id in ids], dtype='<i4')
+        rank = np.empty(count, dtype='<i4')
+        rank[order] = np.arange(count, dtype='<i4')
+        sections[f'order.{sort}'] = order
+        sections[f'rank.{sort}'] = rank
+
+    folded = [row['name'].casefold() for row in rows]
+    sections['index.name'] = np.array(sorted(range(count), key=folded.__getitem__), dtype='<i4')
+
+    # Filter indexes: case-folded value -> [start, length] into a positions array
+    spans = {}
+    for column in INDEXED_COLUMNS:
+        groups = {}
+        for position, row in enumerate(rows):
+            if row[column] is not None:
+                groups.setdefault(row[column].casefold(), []).append(position)
+        flat = []
+        spans[column] = {}
+        for key, positions in groups.items():
+            spans[column][key] = [len(flat), len(positions)]
+            flat.extend(positions)
+        sections[f'index.{column}'] = np.array(flat, dtype='<i4')
+
+    last_refreshed_at, delete_count = version
+    header = {
+        'rows': count,
+        'version': [last_refreshed_at.isoformat() if last_refreshed_at else None, delete_count],
+        'spans': spans,
+        'summary': summary,
+        'generation': generation,
+        'sections': {}
+    }
+    offset = 0
+    for name, array in sections.items():
+        header['sections'][name] = [offset, array.dtype.str, len(array)]
+        offset = _align(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode('utf-8')
+    preamble = MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes
+
+    with atomic_write(path, 'wb') as f:
+        f.write(preamble.ljust(_align(len(preamble)), b'\0'))
+        for array in sections.values():
+            data = array.tobytes()
+            f.write(data.ljust(_align(len(data)), b'\0'))
+
+
+class CountryDataset:
+    """
+    Read-only, memory-mapped view of a published dataset file.
+
+    Every worker maps the same file, so the data lives once in the page
+    cache. current() notices a newly published file with one stat() and
+    swaps to it; requests still holding the old view keep it until done.
+    """
+
+    _current = None
+    _stat_key = None
+    _lock = threading.Lock()
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a dataset file")
+        header_length, = struct.unpack_from('<I', self._map, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._map[header_start:header_start + header_length])
+        data_start = _align(header_start + header_length)
+
+        self.rows = header['rows']
+        last_refreshed_at, delete_count = header['version']
+        self.version = (
+            datetime.fromisoformat(last_refreshed_at) if last_refreshed_at else None,
+            delete_count
+        )
+        self.summary = header.get('summary')
+        self.generation = header.get('generation')
+        self._spans = header['spans']
+        self._strings_start = data_start + header['sections']['strings'][0]
+        self._arrays = {
+            name: np.frombuffer(self._map, dtype=dtype, count=length, offset=data_start + offset)
+            for name, (offset, dtype, length) in header['sections'].items()
+        }
+
+    @classmethod
+    def current(cls):
+        """The latest published dataset, or None if there is none"""
+        if not Config.DATASET_ENABLED:
+            return None
+        try:
+            stat = os.stat(Config.DATASET_PATH)
+        except OSError:
+            return None
+
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != cls._stat_key:
+            with cls._lock:
+                if key != cls._stat_key:
+                    try:
+                        cls._current = cls(Config.DATASET_PATH)
+                    except (OSError, ValueError) as e:
+                        print(f"Could not map dataset: {e}")
+                        return None
+                    cls._stat_key = key
+        return cls._current
+
+    def _text(self, start, length):
+        start += self._strings_start
+        return self._map[start:start + length].decode('utf-8')
+
+    def materialize(self, positions):
+        """Build country dicts (MySQL row types) for row positions"""
+        positions = np.asarray(positions, dtype=np.intp)
+        arrays = self._arrays
+        columns = {
+            'id': arrays['id'][positions].tolist(),
+            'population': arrays['population'][positions].tolist(),
+            'last_refreshed_at': [
+                None if value == NULL_TIMESTAMP else EPOCH + timedelta(microseconds=value)
+                for value in arrays['last_refreshed_at'][positions].tolist()
+            ]
+        }
+        data = self._map
+        base = self._strings_start
+        for column in STRING_COLUMNS:
+            starts = (arrays[f'{column}.offset'][positions].astype(np.int64) + base).tolist()
+            lengths = arrays[f'{column}.length'][positions].tolist()
+            values = [
+                None if length < 0 else data[start:start + length].decode('utf-8')
+                for start, length in zip(starts, lengths)
+            ]
+            if column in DECIMAL_COLUMNS:
+                values = [None if value is None else Decimal(value) for value in values]
+            columns[column] = values
+
+        names = ('id', 'name', 'capital', 'region', 'population', 'currency_code',
+                 'exchange_rate', 'estimated_gdp', 'flag_url', 'last_refreshed_at')
+        return [dict(zip(names, values)) for values in zip(*(columns[name] for name in names))]
+
+    def column(self, column):
+        """All values of one string column, in row order"""
+        data = self._map
+        base = self._strings_start
+        starts = (self._arrays[f'{column}.offset'].astype(np.int64) + base).tolist()
+        lengths = self._arrays[f'{column}.length'].tolist()
+        return [
+            None if length < 0 else data[start:start + length].decode('utf-8')
+            for start, length in zip(starts, lengths)
+        ]
+
+    def find(self, name):
+        """Row position of a case-insensitive name match, or None"""
+        index = self._arrays['index.name']
+        offsets = self._arrays['name.offset']
+        lengths = self._arrays['name.length']
+        target = name.casefold()
+
+        low, high = 0, len(index)
+        while low < high:
+            middle = (low + high) // 2
+            position = index[middle]
+            if self._text(offsets[position], lengths[position]).casefold() < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(index):
+            position = index[low]
+            if self._text(offsets[position], lengths[position]).casefold() == target:
+                return int(position)
+        return None
+
+    def _filter(self, column, value):
+        span = self._spans[column].get(value.casefold())
+        if span is None:
+            return None
+        start, length = span
+        return self._arrays[f'index.{column}'][start:start + length]
+
+    def select(self, region, currency, sort, column, limit=None, after=None):
+        """
+        Row positions matching the filters in sort order, or None when the
+        database should answer instead (unknown filter value, whose match
+        may depend on collation rules, or a cursor row that is gone).
+        """
+        rank = self._arrays[f'rank.{sort}']
+
+        candidates = None
+        for indexed, value in (('region', region), ('currency_code', currency)):
+            if value:
+                matches = self._filter(indexed, value)
+                if matches is None:
+                    return None
+                candidates = matches if candidates is None else np.intersect1d(candidates, matches)
+
+        if candidates is None:
+            ordered = self._arrays[f'order.{sort}']
+        else:
+            ordered = candidates[np.argsort(rank[candidates], kind='stable')]
+
+        if after:
+            value, row_id = after
+            ids = self._arrays['id']
+            position = int(np.searchsorted(ids, row_id))
+            if position >= len(ids) or ids[position] != row_id:
+                return None
+            stored = self.materialize([position])[0][column]
+            if stored != value:
+                return None
+            ordered = ordered[rank[ordered] > rank[position]]
+
+        if limit:
+            ordered = ordered[:limit]
+        return ordered
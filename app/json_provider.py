@@ -0,0 +1,43 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+
+def _iso_datetime(value):
+    """ISO-8601 in UTC with a Z suffix; naive datetimes are taken as UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat() + 'Z'
+
+
+# Exact-type dispatch for the values MySQL rows carry; anything else goes
+# through Flask's default handling
+ENCODERS = {
+    Decimal: str,
+    datetime: _iso_datetime,
+    date: date.isoformat
+}
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    JSON provider for row data.
+    
+    Decimals keep their exact text (as strings), datetimes are ISO-8601
+    with Z like get_status writes them, and keys stay in row order instead
+    of being sorted on every dump. dumps() is compact, as jsonify is
+    outside debug mode, since cached and streamed bodies use it directly.
+    """
+    
+    sort_keys = False
+    
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
+    
+    @staticmethod
+    def default(o):
+        encode = ENCODERS.get(type(o))
+        if encode is not None:
+            return encode(o)
+        return DefaultJSONProvider.default(o)
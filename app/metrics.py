@@ -0,0 +1,171 @@
+import atexit
+import json
+import os
+import threading
+import time
+from app.config import Config
+from app.utils.files import atomic_write
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+METRIC_HELP = {
+    'http_request_duration_seconds': ('histogram', "Request latency by endpoint, method and status"),
+    'db_query_duration_seconds': ('histogram', "Query latency by statement kind"),
+    'db_pool_wait_seconds': ('histogram', "Time spent waiting to check out a pooled connection"),
+    'db_pool_exhausted_total': ('counter', "Checkouts that timed out on an exhausted pool"),
+    'refresh_phase_duration_seconds': ('histogram', "Refresh duration by phase"),
+    'refresh_total': ('counter', "Refreshes by outcome"),
+    'refresh_rows_written_total': ('counter', "Country rows written by refresh, by kind")
+}
+
+
+def label_text(labels, extra=()):
+    """Render label pairs as {key="value",...}"""
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    rendered = []
+    for key, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        rendered.append(f'{key}="{value}"')
+    return "{" + ",".join(rendered) + "}"
+
+
+class Metrics:
+    """
+    Process-local counters and histograms in Prometheus text format.
+
+    Each worker periodically writes its snapshot to Config.METRICS_DIR;
+    /metrics sums the snapshots of all workers on the host.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._flusher = None
+        self._started_at = int(time.time())
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        """Increment a counter"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record a histogram observation"""
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts, then sum and count
+                histogram = self._histograms[key] = [0] * len(DEFAULT_BUCKETS) + [0.0, 0]
+            for index, bound in enumerate(DEFAULT_BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        """JSON-serializable copy of this process's metrics"""
+        with self._lock:
+            return {
+                "counters": [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, dict(labels), list(values)] for (name, labels), values in self._histograms.items()]
+            }
+
+    def _snapshot_path(self):
+        return os.path.join(Config.METRICS_DIR, f"{os.getpid()}-{self._started_at}.json")
+
+    def flush(self):
+        """Write this process's snapshot atomically"""
+        os.makedirs(Config.METRICS_DIR, exist_ok=True)
+        with atomic_write(self._snapshot_path()) as f:
+            json.dump(self.snapshot(), f)
+
+    def start_flusher(self):
+        """Flush every Config.METRICS_FLUSH_INTERVAL seconds in the background"""
+        if self._flusher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(Config.METRICS_FLUSH_INTERVAL)
+                try:
+                    self.flush()
+                except OSError as e:
+                    print(f"Metrics flush failed: {e}")
+
+        self._flusher = threading.Thread(target=run, name='metrics-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def collect(self):
+        """Merge the snapshots of every worker, this one freshly flushed"""
+        self.flush()
+        cutoff = time.time() - Config.METRICS_RETENTION
+
+        counters = {}
+        histograms = {}
+        for entry in os.scandir(Config.METRICS_DIR):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    # Snapshot from a worker that is long gone; another
+                    # worker's /metrics may be removing it too
+                    os.remove(entry.path)
+                    continue
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            for name, labels, value in snapshot['counters']:
+                key = self._key(name, labels)
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = self._key(name, labels)
+                merged = histograms.setdefault(key, [0] * len(values))
+                for index, value in enumerate(values):
+                    merged[index] += value
+
+        return counters, histograms
+
+    def render(self):
+        """All workers' metrics in Prometheus text exposition format"""
+        counters, histograms = self.collect()
+
+        lines = []
+        for name, (kind, help_text) in METRIC_HELP.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{label_text(labels)} {value}")
+                continue
+
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(DEFAULT_BUCKETS, values):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {values[-1]}")
+                lines.append(f"{name}_sum{label_text(labels)} {values[-2]}")
+                lines.append(f"{name}_count{label_text(labels)} {values[-1]}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared metrics registry for this process
+metrics = Metrics()
@@ -1,110 +1,505 @@
 from app.database import Database
-from datetime import datetime
+from app.cache import response_cache, result_cache
+from app.config import Config
+from app.dataset import CountryDataset, write_dataset
+from app.summary import build_summary
+from app.utils.files import lock_exclusive
+from app.utils.validators import ValidationError
+from decimal import Decimal
+import base64
+import json
+import os
+import threading
+import time
+import unicodedata
+
+COUNTRY_COLUMNS = (
+    'name', 'capital', 'region', 'population', 'currency_code',
+    'exchange_rate', 'estimated_gdp', 'flag_url', 'last_refreshed_at'
+)
+
+# Sort key: (column, direction). Every order is tie-broken by id in the same
+# direction, so keyset cursors are unambiguous and the whole ORDER BY can be
+# read straight off an index (InnoDB secondary indexes end with the id).
+SORT_ORDERS = {
+    'gdp_desc': ('estimated_gdp', 'DESC'),
+    'gdp_asc': ('estimated_gdp', 'ASC'),
+    'name_asc': ('name', 'ASC'),
+    'population_desc': ('population', 'DESC')
+}
+
+# Python type of each sort column's value, for decoding cursors
+SORT_VALUE_TYPES = {
+    'estimated_gdp': Decimal,
+    'name': str,
+    'population': int
+}
+
+NULLABLE_SORT_COLUMNS = ('estimated_gdp',)
+
+# Bucket start expressions for downsampled history reads
+HISTORY_BUCKETS = {
+    'hour': "DATE_FORMAT(refreshed_at, '%Y-%m-%d %H:00:00')",
+    'day': "DATE(refreshed_at)",
+    'week': "DATE_SUB(DATE(refreshed_at), INTERVAL WEEKDAY(refreshed_at) DAY)",
+    'month': "DATE_FORMAT(refreshed_at, '%Y-%m-01')"
+}
+
+# History series: table, key column and the value columns returned
+HISTORY_SERIES = {
+    'rates': ('rate_history', 'currency_code', ('rate',)),
+    'gdp': ('gdp_history', 'country_name', ('estimated_gdp', 'population', 'exchange_rate'))
+}
+
+
+def collation_key(text):
+    """
+    Comparison key approximating utf8mb4_unicode_ci equality: case, accents
+    and trailing spaces are ignored, as MySQL does when matching
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).rstrip(' ')
+
 
 class Country:
     """Country data model"""
     
+    # Memoized refresh_metadata read (version and generation, or the error)
+    _version_cache = {'value': None, 'error': None, 'read_at': 0}
+    
+    # Generation a background republish was last started for
+    _republish = {'generation': None, 'lock': threading.Lock()}
+    
     @staticmethod
-    def get_all(region=None, currency=None, sort=None):
-        """Get all countries with optional filters and sorting"""
-        query = "SELECT * FROM countries WHERE 1=1"
+    def _normalize_sort(sort):
+        """Unknown sort values fall back to name order"""
+        return sort if sort in SORT_ORDERS else 'name_asc'
+    
+    @staticmethod
+    def get_all(region=None, currency=None, sort=None, fields=None):
+        """Get all countries with optional filters, sorting and projection (cached)"""
+        sort = Country._normalize_sort(sort)
+        key = (
+            'all',
+            region.lower() if region else None,
+            currency.lower() if currency else None,
+            sort,
+            fields
+        )
+        return result_cache.get_or_load(
+            key, lambda: Country._project(
+                Country._query_all(region, currency, sort, fields), fields
+            )
+        )
+    
+    @staticmethod
+    def get_page(region=None, currency=None, sort=None, fields=None, limit=50, cursor=None):
+        """
+        Get one page of countries using keyset pagination (cached).
+        
+        Returns {"data": rows, "next_cursor": cursor or None}. Raises
+        ValidationError if the cursor is malformed or was issued for a
+        different sort order.
+        """
+        sort = Country._normalize_sort(sort)
+        after = Country.decode_cursor(cursor, sort) if cursor else None
+        key = (
+            'page',
+            region.lower() if region else None,
+            currency.lower() if currency else None,
+            sort,
+            fields,
+            limit,
+            cursor
+        )
+        return result_cache.get_or_load(
+            key, lambda: Country._query_page(region, currency, sort, fields, limit, after)
+        )
+    
+    @staticmethod
+    def _query_page(region, currency, sort, fields, limit, after):
+        """Fetch limit + 1 rows to learn whether another page exists"""
+        column = SORT_ORDERS[sort][0]
+        rows = Country._query_all(region, currency, sort, fields, limit + 1, after)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = Country.encode_cursor(sort, rows[-1][column], rows[-1]['id'])
+        
+        return {
+            "data": Country._project(rows, fields),
+            "next_cursor": next_cursor
+        }
+    
+    @staticmethod
+    def _build_query(region, currency, sort, fields=None, limit=None, after=None):
+        """Build the countries SELECT and its parameters"""
+        column, direction = SORT_ORDERS[sort]
+        
+        if fields:
+            # Sort column and id are always needed to build the next cursor
+            selected = list(fields) + [c for c in (column, 'id') if c not in fields]
+            query = f"SELECT {', '.join(selected)} FROM countries WHERE 1=1"
+        else:
+            query = "SELECT * FROM countries WHERE 1=1"
         params = []
         
         if region:
-            query += " AND LOWER(region) = LOWER(%s)"
+            # Columns use a case-insensitive collation, so plain equality
+            # matches case-insensitively and can use the indexes
+            query += " AND region = %s"
             params.append(region)
         
         if currency:
-            query += " AND LOWER(currency_code) = LOWER(%s)"
+            query += " AND currency_code = %s"
             params.append(currency)
         
+        if after:
+            condition, condition_params = Country._keyset_condition(column, direction, *after)
+            query += f" AND {condition}"
+            params.extend(condition_params)
+        
         # Sorting
-        if sort:
-            if sort == 'gdp_desc':
-                query += " ORDER BY estimated_gdp DESC"
-            elif sort == 'gdp_asc':
-                query += " ORDER BY estimated_gdp ASC"
-            elif sort == 'name_asc':
-                query += " ORDER BY name ASC"
-            elif sort == 'population_desc':
-                query += " ORDER BY population DESC"
-            else:
-                query += " ORDER BY name ASC"
-        else:
-            query += " ORDER BY name ASC"
+        query += f" ORDER BY {column} {direction}, id {direction}"
+        
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+        
+        return query, params
+    
+    @staticmethod
+    def _query_all(region, currency, sort, fields=None, limit=None, after=None):
+        """Run the countries SELECT against the dataset file, else the database"""
+        dataset = Country.get_dataset()
+        if dataset is not None:
+            positions = dataset.select(region, currency, sort, SORT_ORDERS[sort][0], limit, after)
+            if positions is not None:
+                return dataset.materialize(positions)
+        
+        query, params = Country._build_query(region, currency, sort, fields, limit, after)
         
         with Database.get_cursor() as cursor:
             cursor.execute(query, params)
             return cursor.fetchall()
     
+    @staticmethod
+    def iter_all(region=None, currency=None, sort=None, fields=None):
+        """
+        Yield countries one at a time from the dataset file, or else from an
+        unbuffered server-side cursor.
+        
+        Bypasses the result cache; the pooled connection is released when
+        the generator is exhausted or closed.
+        """
+        sort = Country._normalize_sort(sort)
+        
+        dataset = Country.get_dataset()
+        positions = None
+        if dataset is not None:
+            positions = dataset.select(region, currency, sort, SORT_ORDERS[sort][0])
+        
+        if positions is not None:
+            batch_size = Config.STREAM_BATCH_SIZE
+            rows = (
+                row
+                for offset in range(0, len(positions), batch_size)
+                for row in dataset.materialize(positions[offset:offset + batch_size])
+            )
+        else:
+            query, params = Country._build_query(region, currency, sort, fields)
+            rows = Database.stream(query, params)
+        
+        for row in rows:
+            if fields:
+                row = {field: row[field] for field in fields}
+            yield row
+    
+    @staticmethod
+    def _keyset_condition(column, direction, value, row_id):
+        """WHERE clause selecting rows that sort after (value, row_id)"""
+        operator = '<' if direction == 'DESC' else '>'
+        
+        # MySQL sorts NULLs first ascending and last descending
+        if value is None:
+            if direction == 'DESC':
+                return f"({column} IS NULL AND id < %s)", [row_id]
+            return f"(({column} IS NULL AND id > %s) OR {column} IS NOT NULL)", [row_id]
+        
+        condition = f"{column} {operator} %s OR ({column} = %s AND id {operator} %s)"
+        if direction == 'DESC' and column in NULLABLE_SORT_COLUMNS:
+            condition += f" OR {column} IS NULL"
+        return f"({condition})", [value, value, row_id]
+    
+    @staticmethod
+    def _project(rows, fields):
+        """Narrow rows to the requested fields"""
+        if not fields:
+            return rows
+        return [{field: row[field] for field in fields} for row in rows]
+    
+    @staticmethod
+    def encode_cursor(sort, value, row_id):
+        """Encode an opaque keyset cursor"""
+        payload = [sort, None if value is None else str(value), row_id]
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor, sort):
+        """Decode a keyset cursor into (value, row_id)"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+            if value is not None:
+                value = SORT_VALUE_TYPES[SORT_ORDERS[cursor_sort][0]](value)
+            row_id = int(row_id)
+        except (ValueError, TypeError, KeyError, ArithmeticError):
+            raise ValidationError({"cursor": "is invalid"})
+        
+        if cursor_sort != sort:
+            raise ValidationError({"cursor": "does not match sort order"})
+        return value, row_id
+    
     @staticmethod
     def get_by_name(name):
-        """Get country by name (case-insensitive)"""
-        query = "SELECT * FROM countries WHERE LOWER(name) = LOWER(%s)"
+        """Get country by name (case-insensitive, cached)"""
+        return result_cache.get_or_load(
+            ('name', name.lower()), lambda: Country._query_by_name(name)
+        )
+    
+    @staticmethod
+    def _query_by_name(name):
+        """Look a country up in the dataset file, else the database"""
+        dataset = Country.get_dataset()
+        if dataset is not None:
+            position = dataset.find(name)
+            # A miss may still match under MySQL's collation (accents etc.)
+            if position is not None:
+                return dataset.materialize([position])[0]
+        
+        query = "SELECT * FROM countries WHERE name = %s"
         
         with Database.get_cursor() as cursor:
             cursor.execute(query, (name,))
             return cursor.fetchone()
     
+    @staticmethod
+    def get_many(names=(), currencies=()):
+        """
+        Look up many countries by name and by currency code at once.
+        
+        Returns ({name: row or None}, {code: [rows in name order]}), keyed by
+        the inputs as given. The dataset file answers what it can; the rest
+        goes to MySQL as one IN (...) query per kind.
+        """
+        by_name = {}
+        by_currency = {}
+        pending_names = list(names)
+        pending_currencies = list(currencies)
+        
+        dataset = Country.get_dataset()
+        if dataset is not None:
+            positions = [dataset.find(name) for name in pending_names]
+            rows = iter(dataset.materialize([p for p in positions if p is not None]))
+            pending_names = []
+            for name, position in zip(names, positions):
+                if position is None:
+                    pending_names.append(name)
+                else:
+                    by_name[name] = next(rows)
+            
+            remaining = []
+            for code in pending_currencies:
+                positions = dataset.select(None, code, 'name_asc', 'name')
+                if positions is None:
+                    remaining.append(code)
+                else:
+                    by_currency[code] = dataset.materialize(positions)
+            pending_currencies = remaining
+        
+        if not (pending_names or pending_currencies):
+            return by_name, by_currency
+        
+        with Database.get_cursor() as cursor:
+            if pending_names:
+                placeholders = ", ".join(["%s"] * len(pending_names))
+                cursor.execute(f"SELECT * FROM countries WHERE name IN ({placeholders})", pending_names)
+                # MySQL matched under its collation ("Cote d'Ivoire" finds
+                # "Côte d'Ivoire"), so map rows back to inputs the same way
+                found = {collation_key(row['name']): row for row in cursor.fetchall()}
+                for name in pending_names:
+                    by_name[name] = found.get(collation_key(name))
+            
+            if pending_currencies:
+                placeholders = ", ".join(["%s"] * len(pending_currencies))
+                cursor.execute(
+                    f"SELECT * FROM countries WHERE currency_code IN ({placeholders}) ORDER BY name ASC, id ASC",
+                    pending_currencies
+                )
+                groups = {}
+                for row in cursor.fetchall():
+                    groups.setdefault(collation_key(row['currency_code']), []).append(row)
+                for code in pending_currencies:
+                    by_currency[code] = groups.get(collation_key(code), [])
+        
+        return by_name, by_currency
+    
     @staticmethod
     def delete_by_name(name):
         """Delete country by name (case-insensitive)"""
-        query = "DELETE FROM countries WHERE LOWER(name) = LOWER(%s)"
+        query = "DELETE FROM countries WHERE name = %s"
         
-        with Database.get_cursor() as cursor:
+        with Database.transaction() as cursor:
             cursor.execute(query, (name,))
-            return cursor.rowcount > 0
-    
-    @staticmethod
-    def upsert_batch(countries_data):
-        """Insert or update multiple countries"""
-        query = """
-            INSERT INTO countries 
-            (name, capital, region, population, currency_code, exchange_rate, estimated_gdp, flag_url, last_refreshed_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                capital = VALUES(capital),
-                region = VALUES(region),
-                population = VALUES(population),
-                currency_code = VALUES(currency_code),
-                exchange_rate = VALUES(exchange_rate),
-                estimated_gdp = VALUES(estimated_gdp),
-                flag_url = VALUES(flag_url),
-                last_refreshed_at = VALUES(last_refreshed_at)
+            deleted = cursor.rowcount > 0
+            if deleted:
+                Country._record_delete(cursor)
+        
+        if deleted:
+            result_cache.bump_generation()
+            Country._version_cache['read_at'] = 0
+            Country.publish_dataset()
+        return deleted
+    
+    @staticmethod
+    def _row_signature(row):
+        """Comparable form of a country row, at the column precision MySQL stores"""
+        name, capital, region, population, currency_code, exchange_rate, estimated_gdp, flag_url = row[:8]
+        return (
+            capital,
+            region,
+            int(population),
+            currency_code,
+            None if exchange_rate is None else f"{exchange_rate:.6f}",
+            None if estimated_gdp is None else f"{estimated_gdp:.2f}",
+            flag_url
+        )
+    
+    @staticmethod
+    def upsert_changed(countries_data, chunk_size=None, refreshed_at=None):
         """
+        Write only new or changed countries.
         
-        with Database.get_cursor() as cursor:
-            cursor.executemany(query, countries_data)
-            return cursor.rowcount
+        Diffs countries_data against the stored rows and upserts the
+        difference in chunked multi-row statements inside one transaction,
+        which also updates refresh_metadata (row count, generation and, if
+        given, the refresh time). Returns inserted/updated/unchanged counts
+        and the resulting total.
+        """
+        chunk_size = chunk_size or Config.UPSERT_CHUNK_SIZE
+        columns = ", ".join(COUNTRY_COLUMNS)
+        updates = ", ".join(
+            f"{column} = VALUES({column})" for column in COUNTRY_COLUMNS[1:]
+        )
+        placeholders = "(" + ", ".join(["%s"] * len(COUNTRY_COLUMNS)) + ")"
+        
+        with Database.transaction(dictionary=False) as cursor:
+            cursor.execute(
+                f"SELECT {', '.join(COUNTRY_COLUMNS[:8])} FROM countries FOR UPDATE"
+            )
+            # Names are unique under a case-insensitive collation
+            stored = {
+                row[0].lower(): Country._row_signature(row)
+                for row in cursor.fetchall()
+            }
+            
+            changed = []
+            inserted = 0
+            for row in countries_data:
+                current = stored.get(row[0].lower())
+                if current is None:
+                    inserted += 1
+                    changed.append(row)
+                elif current != Country._row_signature(row):
+                    changed.append(row)
+            
+            for offset in range(0, len(changed), chunk_size):
+                chunk = changed[offset:offset + chunk_size]
+                query = (
+                    f"INSERT INTO countries ({columns}) VALUES "
+                    + ", ".join([placeholders] * len(chunk))
+                    + f" ON DUPLICATE KEY UPDATE {updates}"
+                )
+                cursor.execute(query, [value for row in chunk for value in row])
+            
+            if changed or refreshed_at is not None:
+                # Rows are locked FOR UPDATE, so the total is exact
+                Country._update_metadata(cursor, len(stored) + inserted, refreshed_at)
+        
+        if changed:
+            result_cache.bump_generation()
+        if changed or refreshed_at is not None:
+            Country._version_cache['read_at'] = 0
+        
+        return {
+            "inserted": inserted,
+            "updated": len(changed) - inserted,
+            "unchanged": len(countries_data) - len(changed),
+            "total": len(stored) + inserted
+        }
     
     @staticmethod
     def count():
         """Get total number of countries"""
-        query = "SELECT COUNT(*) as count FROM countries"
+        dataset = Country.get_dataset()
+        if dataset is not None:
+            return dataset.rows
+        
+        return Country.get_status()['country_count']
+    
+    @staticmethod
+    def get_status():
+        """
+        Get country_count, generation and last_refreshed_at.
+        
+        In memory from the dataset file when one is published, otherwise a
+        single primary-key read of refresh_metadata, which every write
+        keeps current.
+        """
+        dataset = Country.get_dataset()
+        if dataset is not None and dataset.generation is not None:
+            return {
+                "country_count": dataset.rows,
+                "generation": dataset.generation,
+                "last_refreshed_at": dataset.version[0]
+            }
+        
+        query = "SELECT country_count, generation, last_refreshed_at FROM refresh_metadata WHERE id = 1"
         
         with Database.get_cursor() as cursor:
             cursor.execute(query)
             result = cursor.fetchone()
-            return result['count'] if result else 0
+        return result or {"country_count": 0, "generation": 0, "last_refreshed_at": None}
     
     @staticmethod
-    def get_top_by_gdp(limit=5):
-        """Get top countries by estimated GDP"""
-        query = """
-            SELECT name, estimated_gdp 
-            FROM countries 
-            WHERE estimated_gdp IS NOT NULL 
-            ORDER BY estimated_gdp DESC 
-            LIMIT %s
+    def get_summary():
         """
+        Get the precomputed region/currency aggregates.
         
+        Read from the dataset file header, where refresh and delete store
+        them; without a dataset they are computed once per cache generation.
+        """
+        dataset = Country.get_dataset()
+        if dataset is not None and dataset.summary is not None:
+            return dataset.summary
+        return result_cache.get_or_load(('summary',), Country._query_summary)
+    
+    @staticmethod
+    def _query_summary():
+        """Compute the aggregates from the countries table"""
         with Database.get_cursor() as cursor:
-            cursor.execute(query, (limit,))
-            return cursor.fetchall()
+            cursor.execute("SELECT id, name, region, population, currency_code, estimated_gdp FROM countries")
+            rows = cursor.fetchall()
+        return build_summary(rows, Config.SUMMARY_TOP_N)
     
     @staticmethod
     def get_last_refresh():
         """Get last refresh timestamp"""
+        dataset = Country.get_dataset()
+        if dataset is not None:
+            return dataset.version[0]
+        
         query = "SELECT last_refreshed_at FROM refresh_metadata WHERE id = 1"
         
         with Database.get_cursor() as cursor:
@@ -113,9 +508,256 @@ class Country:
             return result['last_refreshed_at'] if result else None
     
     @staticmethod
-    def update_refresh_timestamp():
-        """Update global refresh timestamp"""
-        query = "UPDATE refresh_metadata SET last_refreshed_at = %s WHERE id = 1"
+    def _record_delete(cursor):
+        """Count a delete in refresh_metadata without touching last_refreshed_at"""
+        # Assigning last_refreshed_at to itself stops ON UPDATE CURRENT_TIMESTAMP firing
+        cursor.execute("""
+            UPDATE refresh_metadata
+            SET delete_count = delete_count + 1,
+                country_count = country_count - 1,
+                generation = generation + 1,
+                last_refreshed_at = last_refreshed_at
+            WHERE id = 1
+        """)
+    
+    @staticmethod
+    def _update_metadata(cursor, country_count, refreshed_at=None):
+        """Store the row count and bump the generation (and the refresh time, if given)"""
+        if refreshed_at is None:
+            cursor.execute(
+                """
+                UPDATE refresh_metadata
+                SET country_count = %s, generation = generation + 1, last_refreshed_at = last_refreshed_at
+                WHERE id = 1
+                """,
+                (country_count,)
+            )
+        else:
+            cursor.execute(
+                """
+                UPDATE refresh_metadata
+                SET country_count = %s, generation = generation + 1, last_refreshed_at = %s
+                WHERE id = 1
+                """,
+                (country_count, refreshed_at)
+            )
+    
+    @staticmethod
+    def _get_metadata():
+        """
+        Get {"version", "generation"} from refresh_metadata, memoized for
+        Config.DATA_VERSION_TTL seconds (failures too, re-raised until then)
+        """
+        state = Country._version_cache
+        now = time.monotonic()
+        if not state['read_at'] or now - state['read_at'] >= Config.DATA_VERSION_TTL:
+            query = "SELECT last_refreshed_at, delete_count, generation FROM refresh_metadata WHERE id = 1"
+            try:
+                with Database.get_cursor() as cursor:
+                    cursor.execute(query)
+                    result = cursor.fetchone()
+                state['value'] = {
+                    "version": (result['last_refreshed_at'], result['delete_count']) if result else (None, 0),
+                    "generation": result['generation'] if result else 0
+                }
+                state['error'] = None
+            except Exception as e:
+                state['value'], state['error'] = None, e
+            state['read_at'] = now
+        
+        if state['error'] is not None:
+            raise state['error'].with_traceback(None)
+        return state['value']
+    
+    @staticmethod
+    def get_dataset():
+        """
+        Get the published dataset file, if it holds the latest data.
+        
+        Its generation is checked against refresh_metadata (memoized, see
+        _get_metadata), so writes this host didn't publish - another host,
+        manual SQL, a crash before publishing - are noticed: reads go to
+        MySQL and the file is republished in the background. While MySQL
+        is unreachable the file is served as it is.
+        """
+        dataset = CountryDataset.current()
+        if dataset is None:
+            return None
+        
+        try:
+            generation = Country._get_metadata()['generation']
+        except Exception:
+            return dataset
+        
+        if dataset.generation == generation:
+            return dataset
+        Country._republish_in_background(generation)
+        return None
+    
+    @staticmethod
+    def _republish_in_background(generation):
+        """Publish the dataset file in a background thread, once per generation"""
+        state = Country._republish
+        if state['generation'] == generation or not state['lock'].acquire(blocking=False):
+            return
+        state['generation'] = generation
+        
+        def run():
+            try:
+                Country.publish_dataset(only_if_stale=True)
+            finally:
+                state['lock'].release()
+        
+        threading.Thread(target=run, name='dataset-republish', daemon=True).start()
+    
+    @staticmethod
+    def get_data_version():
+        """
+        Get (last_refreshed_at, delete_count) identifying the current data.
+        
+        Taken from the dataset file when it is current; otherwise from
+        refresh_metadata, memoized so conditional requests usually cost no
+        query at all.
+        """
+        dataset = Country.get_dataset()
+        if dataset is not None:
+            version = dataset.version
+        else:
+            version = Country._get_metadata()['version']
+        
+        result_cache.observe_version(version)
+        response_cache.observe_version(version)
+        return version
+    
+    @staticmethod
+    def publish_dataset(only_if_stale=False):
+        """
+        Write the countries table to the memory-mapped dataset file.
+        
+        Rows, data version and sort orders are read in one transaction, and
+        publishers are serialized by a file lock, so the last file written
+        reflects the latest committed data. With only_if_stale nothing is
+        written if the file already has the current generation (another
+        publisher got there first). On failure the file is removed and
+        reads fall back to MySQL rather than serve stale data.
+        """
+        if not Config.DATASET_ENABLED:
+            return False
+        
+        os.makedirs(os.path.dirname(Config.DATASET_PATH), exist_ok=True)
+        lock_fd = os.open(f"{Config.DATASET_PATH}.lock", os.O_RDWR | os.O_CREAT)
+        try:
+            lock_exclusive(lock_fd)
+            with Database.transaction() as cursor:
+                cursor.execute("SELECT last_refreshed_at, delete_count, generation FROM refresh_metadata WHERE id = 1")
+                result = cursor.fetchone()
+                version = (result['last_refreshed_at'], result['delete_count']) if result else (None, 0)
+                generation = result['generation'] if result else 0
+                
+                published = CountryDataset.current()
+                if only_if_stale and published is not None and published.generation == generation:
+                    return True
+                
+                cursor.execute("SELECT * FROM countries ORDER BY id")
+                rows = cursor.fetchall()
+                
+                orders = {}
+                for sort, (column, direction) in SORT_ORDERS.items():
+                    cursor.execute(f"SELECT id FROM countries ORDER BY {column} {direction}, id {direction}")
+                    orders[sort] = [row['id'] for row in cursor.fetchall()]
+            
+            summary = build_summary(rows, Config.SUMMARY_TOP_N)
+            write_dataset(Config.DATASET_PATH, rows, version, orders, summary, generation)
+            return True
+        except Exception as e:
+            print(f"Error publishing dataset: {e}")
+            try:
+                os.remove(Config.DATASET_PATH)
+            except OSError:
+                pass
+            return False
+        finally:
+            os.close(lock_fd)
+
+
+class History:
+    """Append-only exchange rate and GDP history"""
+    
+    @staticmethod
+    def append(refreshed_at, rates, countries_data, chunk_size=None):
+        """
+        Record one refresh: the full rate table ({code: units per USD}) and
+        each country's processed tuple, in one transaction.
+        """
+        chunk_size = chunk_size or Config.UPSERT_CHUNK_SIZE
+        rate_rows = [
+            (code.upper(), rate) for code, rate in rates.items()
+            if isinstance(rate, (int, float)) and not isinstance(rate, bool) and rate > 0
+        ]
+        
+        with Database.transaction(dictionary=False) as cursor:
+            cursor.execute(
+                "INSERT INTO refresh_history (refreshed_at, currency_count, country_count) VALUES (%s, %s, %s)",
+                (refreshed_at, len(rate_rows), len(countries_data))
+            )
+            refresh_id = cursor.lastrowid
+            
+            batches = (
+                ("rate_history (currency_code, refreshed_at, refresh_id, rate)", "(%s, %s, %s, %s)",
+                 [(code, refreshed_at, refresh_id, rate) for code, rate in rate_rows]),
+                ("gdp_history (country_name, refreshed_at, refresh_id, population, exchange_rate, estimated_gdp)",
+                 "(%s, %s, %s, %s, %s, %s)",
+                 [(row[0], refreshed_at, refresh_id, row[3], row[5], row[6]) for row in countries_data])
+            )
+            for target, placeholders, rows in batches:
+                for offset in range(0, len(rows), chunk_size):
+                    chunk = rows[offset:offset + chunk_size]
+                    cursor.execute(
+                        f"INSERT INTO {target} VALUES " + ", ".join([placeholders] * len(chunk)),
+                        [value for row in chunk for value in row]
+                    )
+        
+        return refresh_id
+    
+    @staticmethod
+    def get_series(series, key, start, end, bucket=None, limit=None):
+        """
+        Read one currency's or country's history between start and end.
+        
+        Raw points are (refreshed_at, values...); with a bucket ('hour',
+        'day', 'week', 'month') each point is the bucket start with avg,
+        min, max and last of the first value column, plus the sample count.
+        Served by a primary-key range scan of that one series.
+        Returns (points, truncated).
+        """
+        table, key_column, value_columns = HISTORY_SERIES[series]
+        limit = limit or Config.HISTORY_MAX_POINTS
+        value = value_columns[0]
+        
+        if bucket:
+            bucket_expr = HISTORY_BUCKETS[bucket]
+            query = f"""
+                SELECT {bucket_expr} AS bucket,
+                       AVG({value}) AS avg, MIN({value}) AS min, MAX({value}) AS max,
+                       SUBSTRING_INDEX(GROUP_CONCAT({value} ORDER BY refreshed_at DESC), ',', 1) AS last,
+                       COUNT(*) AS samples
+                FROM {table}
+                WHERE {key_column} = %s AND refreshed_at >= %s AND refreshed_at < %s
+                GROUP BY bucket
+                ORDER BY bucket
+                LIMIT %s
+            """
+        else:
+            query = f"""
+                SELECT refreshed_at, {', '.join(value_columns)}
+                FROM {table}
+                WHERE {key_column} = %s AND refreshed_at >= %s AND refreshed_at < %s
+                ORDER BY refreshed_at
+                LIMIT %s
+            """
         
         with Database.get_cursor() as cursor:
-            cursor.execute(query, (datetime.now(),))
\ No newline at end of file
+            cursor.execute(query, (key, start, end, limit + 1))
+            points = cursor.fetchall()
+        
+        return points[:limit], len(points) > limit
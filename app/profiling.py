@@ -0,0 +1,255 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import lru_cache, wraps
+from app.config import BASE_DIR, Config
+from app.utils.files import atomic_write
+
+# SQL fingerprints: literals and placeholders become ?, value lists collapse
+_SQL_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|%s|\b\d+(?:\.\d+)?\b")
+_SQL_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SQL_REPEATED_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+
+
+@lru_cache(maxsize=512)
+def fingerprint(query):
+    """Normalized SQL text, so the same statement with other values groups together"""
+    text = _SQL_LITERALS.sub('?', ' '.join(query.split()))
+    text = _SQL_VALUE_LIST.sub('(...)', text)
+    return _SQL_REPEATED_ROWS.sub('(...), ...', text)
+
+
+class _NoopSpan:
+    """Returned when no trace is active; costs one call to enter and exit"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """One timed operation within a traced request"""
+
+    __slots__ = ('_trace', '_started', 'record')
+
+    def __init__(self, trace, kind, name, attrs):
+        self._trace = trace
+        self._started = None
+        self.record = {"kind": kind, "name": name, **attrs}
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter()
+        self.record["start_ms"] = round((self._started - self._trace.started) * 1000, 3)
+        self.record["duration_ms"] = round((ended - self._started) * 1000, 3)
+        if exc_type is not None:
+            self.record["error"] = exc_type.__name__
+        self._trace.add(self.record)
+        return False
+
+    def set(self, **attrs):
+        self.record.update(attrs)
+
+
+class _Trace:
+    """Spans collected for the request running on this thread"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self.dropped = 0
+
+    def add(self, record):
+        if len(self.spans) < Config.TRACE_MAX_SPANS:
+            self.spans.append(record)
+        else:
+            self.dropped += 1
+
+
+class Tracer:
+    """
+    Opt-in per-request spans and the slow-request log.
+
+    With Config.TRACE_ENABLED each request collects spans (queries, upstream
+    fetches, image renders); span() is a no-op outside a traced request.
+    Requests slower than Config.SLOW_REQUEST_MS are logged as one JSON
+    line, with their spans if tracing is on.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def begin(self):
+        """Start a trace for the current request, if tracing is enabled"""
+        self._local.trace = _Trace() if Config.TRACE_ENABLED else None
+
+    def end(self, method, path, endpoint, status, elapsed):
+        """Finish the current request; returns the slow-log entry, if it was slow"""
+        trace = getattr(self._local, 'trace', None)
+        self._local.trace = None
+
+        if not Config.SLOW_REQUEST_MS or elapsed * 1000 < Config.SLOW_REQUEST_MS:
+            return None
+
+        entry = {
+            "method": method,
+            "path": path,
+            "endpoint": endpoint,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3)
+        }
+        if trace is not None:
+            spans = sorted(trace.spans, key=lambda span: span["start_ms"])
+            for span in spans:
+                if span["kind"] == 'db':
+                    span["name"] = fingerprint(span["name"])
+            totals = Counter()
+            for span in spans:
+                totals[span["kind"]] += span["duration_ms"]
+            entry["time_ms"] = {kind: round(total, 3) for kind, total in totals.items()}
+            entry["spans"] = spans
+            if trace.dropped:
+                entry["dropped_spans"] = trace.dropped
+
+        print(f"Slow request: {json.dumps(entry, default=str)}")
+        return entry
+
+    def span(self, kind, name, **attrs):
+        """Context manager timing one operation of the current request"""
+        trace = getattr(self._local, 'trace', None)
+        if trace is None:
+            return _NOOP_SPAN
+        return _Span(trace, kind, name, attrs)
+
+    def traced(self, kind, name):
+        """Decorator recording every call as a span"""
+        def decorate(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(kind, name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    path = os.path.relpath(code.co_filename, BASE_DIR)
+    if path.startswith('..'):
+        path = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(';', ':')
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread in this worker for a while and
+    writes them in collapsed ("folded") format: one "thread;outer;...;inner
+    count" line per distinct stack, as read by flamegraph.pl, speedscope
+    and similar tools.
+
+    A profile runs in a background thread; a <id>.pending marker in
+    Config.PROFILE_DIR lets any worker report it as running until the
+    <id>.folded result appears.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = None
+
+    @staticmethod
+    def _path(profile_id, suffix):
+        return os.path.join(Config.PROFILE_DIR, f"{profile_id}.{suffix}")
+
+    def start(self, seconds, interval):
+        """Start profiling this worker; returns the profile id, or None if one is running"""
+        with self._lock:
+            if self._running is not None:
+                return None
+            profile_id = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+            self._running = profile_id
+
+        try:
+            os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+            with open(self._path(profile_id, 'pending'), 'w', encoding='utf-8') as f:
+                json.dump({"pid": os.getpid(), "ends_at": time.time() + seconds}, f)
+        except OSError:
+            with self._lock:
+                self._running = None
+            raise
+
+        threading.Thread(
+            target=self._run, args=(profile_id, seconds, interval), name='profiler', daemon=True
+        ).start()
+        return profile_id
+
+    def _run(self, profile_id, seconds, interval):
+        try:
+            stacks = self._sample(seconds, interval)
+            with atomic_write(self._path(profile_id, 'folded')) as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except Exception as e:
+            print(f"Profile {profile_id} failed: {e}")
+        finally:
+            try:
+                os.remove(self._path(profile_id, 'pending'))
+            except OSError:
+                pass
+            with self._lock:
+                self._running = None
+
+    @staticmethod
+    def _sample(seconds, interval):
+        own = threading.get_ident()
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}").replace(';', ':'))
+                stacks[';'.join(reversed(labels))] += 1
+            time.sleep(interval)
+        return stacks
+
+    def status(self, profile_id):
+        """('done', path), ('running', None) or (None, None) for a profile id"""
+        if not re.fullmatch(r"\d+-[0-9a-f]{12}", profile_id):
+            return None, None
+        path = self._path(profile_id, 'folded')
+        if os.path.exists(path):
+            return 'done', path
+        try:
+            with open(self._path(profile_id, 'pending'), 'r', encoding='utf-8') as f:
+                pending = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        # A marker left behind by a worker that died mid-profile
+        if time.time() > pending["ends_at"] + 60:
+            return None, None
+        return 'running', None
+
+
+tracer = Tracer()
+profiler = SamplingProfiler()
@@ -1,44 +1,127 @@
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, current_app, jsonify, request, send_file, stream_with_context
 from app.services.country_service import CountryService
+from app.services.image_service import IMAGE_MIMETYPES, ImageService
+from app.services.exchange_service import ExchangeService
+from app.services.export_service import EXPORT_TABLES, ExportService
+from app.services.history_service import HistoryService
+from app.services.job_service import ACTIVE_STATUSES, JobService
 from app.config import Config
+from app.cache import COMPRESSORS, EncodedBody, response_cache, result_cache
+from app.metrics import metrics
+from app.profiling import profiler
+from app.utils.validators import (
+    ValidationError, parse_conversions, parse_fields, parse_limit, parse_lookup, parse_time_range
+)
+from app.models import HISTORY_BUCKETS
+import hashlib
+import hmac
 import os
 
 api_bp = Blueprint('api', __name__)
 
+
+def _flag(value):
+    """Parse a boolean query parameter"""
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+
+def _etag_for(*parts, version=None):
+    """
+    Strong ETag for the current data version (or the given one) plus the
+    request's own key.
+    
+    Only reads refresh_metadata (memoized), so a matching If-None-Match can
+    be answered before any data query runs.
+    """
+    last_refreshed_at, delete_count = version or CountryService.get_data_version()
+    query = sorted(request.args.items(multi=True))
+    raw = f"{request.url_rule.rule}|{query}|{parts}|{last_refreshed_at}|{delete_count}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _not_modified(etag):
+    """304 response if the client already holds this ETag (or a compressed variant's), else None"""
+    for tag in (etag, *(f"{etag}-{coding}" for coding in COMPRESSORS)):
+        if tag in request.if_none_match:
+            response = Response(status=304)
+            response.vary.add('Accept-Encoding')
+            return _cache_headers(response, tag)
+    return None
+
+
+def _cache_headers(response, etag):
+    """Attach ETag and the configured Cache-Control policy"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = Config.CACHE_CONTROL
+    return response
+
+
+def _json_body(etag, load):
+    """
+    Serialized JSON body for an ETag, or None if load() found nothing.
+    
+    The ETag already covers the route, query and data version, so a cached
+    body skips both the data load and the encoding.
+    """
+    def encode():
+        value = load()
+        if value is None:
+            return None
+        return EncodedBody((current_app.json.dumps(value) + "\n").encode('utf-8'))
+    
+    return response_cache.get_or_load(etag, encode)
+
+
+def _json_response(body, etag):
+    """Response for a cached body, compressed if the client accepts it"""
+    coding = None
+    if len(body.data) >= Config.COMPRESS_MIN_SIZE:
+        coding = request.accept_encodings.best_match(COMPRESSORS)
+    
+    response = Response(body.encoded(coding), mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if coding:
+        response.content_encoding = coding
+        # A strong ETag names one representation
+        etag = f"{etag}-{coding}"
+    return _cache_headers(response, etag)
+
+
+def _stream_format():
+    """Requested streaming format ('json' or 'ndjson'), or None"""
+    stream = (request.args.get('stream') or '').lower()
+    if stream in ('json', 'ndjson'):
+        return stream
+    if _flag(stream):
+        return 'json'
+    if request.accept_mimetypes.best == 'application/x-ndjson':
+        return 'ndjson'
+    return None
+
+
+def _stream_rows(rows, fmt):
+    """Serialize rows incrementally as a JSON array or NDJSON lines"""
+    dumps = current_app.json.dumps
+    
+    if fmt == 'ndjson':
+        for row in rows:
+            yield dumps(row) + "\n"
+        return
+    
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + dumps(row)
+        separator = ","
+    yield "]\n"
+
+
 @api_bp.route('/init-db', methods=['POST'])
 def init_db():
     """Initialize database - Call once after deployment"""
     try:
-        sql_statements = """
-        CREATE TABLE IF NOT EXISTS countries (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(255) NOT NULL UNIQUE,
-            capital VARCHAR(255),
-            region VARCHAR(100),
-            population BIGINT NOT NULL,
-            currency_code VARCHAR(10),
-            exchange_rate DECIMAL(15, 6),
-            estimated_gdp DECIMAL(20, 2),
-            flag_url TEXT,
-            last_refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            INDEX idx_name (name),
-            INDEX idx_region (region),
-            INDEX idx_currency (currency_code)
-        );
-        
-        CREATE TABLE IF NOT EXISTS refresh_metadata (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            last_refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-        );
-        
-        INSERT IGNORE INTO refresh_metadata (id) VALUES (1);
-        """
-        
         from app.database import Database
-        with Database.get_cursor() as cursor:
-            for statement in sql_statements.split(';'):
-                if statement.strip():
-                    cursor.execute(statement)
+        Database.apply_schema()
         
         return jsonify({"message": "Database initialized successfully"}), 200
     except Exception as e:
@@ -46,26 +129,269 @@ def init_db():
         return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
 
 
+@api_bp.route('/healthz', methods=['GET'])
+def liveness():
+    """Liveness probe: the worker is serving; touches neither MySQL nor the dataset"""
+    response = jsonify({"status": "ok"})
+    response.headers['Cache-Control'] = 'no-store'
+    return response, 200
+
+
 @api_bp.route('/status', methods=['GET'])
 def get_status():
     """Get API status with total countries and last refresh timestamp"""
     try:
-        status = CountryService.get_status()
-        return jsonify(status), 200
+        etag = _etag_for()
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        return _json_response(_json_body(etag, CountryService.get_status), etag), 200
         
     except Exception as e:
         print(f"Status error: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
 
+@api_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """Get the precomputed summary: totals, top GDP, region and currency groups"""
+    try:
+        etag = _etag_for()
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        return _json_response(_json_body(etag, CountryService.get_stats), etag), 200
+        
+    except Exception as e:
+        print(f"Stats error: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@api_bp.route('/stats/<string:group>', methods=['GET'])
+def get_group_stats(group):
+    """Get per-region or per-currency statistics (?top=N trims top GDP lists)"""
+    try:
+        if group not in ('regions', 'currencies'):
+            return jsonify({"error": "Unknown statistics group"}), 404
+        top = parse_limit(request.args.get('top'), maximum=Config.SUMMARY_TOP_N, name='top')
+        
+        etag = _etag_for(group)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        body = _json_body(etag, lambda: CountryService.get_stats(group, top))
+        return _json_response(body, etag), 200
+        
+    except ValidationError as e:
+        return jsonify({"error": "Validation failed", "details": e.details}), 400
+    except Exception as e:
+        print(f"Stats error: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@api_bp.route('/convert', methods=['GET', 'POST'])
+def convert():
+    """Convert one amount (GET ?from=&to=&amount=) or a batch (POST JSON)"""
+    try:
+        if request.method == 'GET':
+            body = {"conversions": [{
+                "from": request.args.get('from'),
+                "to": request.args.get('to'),
+                "amount": request.args.get('amount', 1)
+            }]}
+        else:
+            body = request.get_json(silent=True)
+        sources, targets, amounts = parse_conversions(body)
+        
+        converted = ExchangeService.convert(sources, targets, amounts)
+        if converted is None:
+            return jsonify({"error": "Exchange rates not available"}), 503
+        results, as_of = converted
+        
+        if request.method == 'GET':
+            return jsonify({**results[0], "rates_as_of": as_of}), 200
+        return jsonify({"results": results, "rates_as_of": as_of}), 200
+        
+    except ValidationError as e:
+        return jsonify({"error": "Validation failed", "details": e.details}), 400
+    except Exception as e:
+        print(f"Convert error: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _history(series, key):
+    """Serve one history series for the from/to/bucket query parameters"""
+    try:
+        start, end = parse_time_range(request.args.get('from'), request.args.get('to'))
+        bucket = (request.args.get('bucket') or 'raw').lower()
+        if bucket != 'raw' and bucket not in HISTORY_BUCKETS:
+            raise ValidationError({"bucket": f"must be one of raw, {', '.join(HISTORY_BUCKETS)}"})
+        
+        result = HistoryService.get_series(series, key, start, end, None if bucket == 'raw' else bucket)
+        return jsonify(result), 200
+        
+    except ValidationError as e:
+        return jsonify({"error": "Validation failed", "details": e.details}), 400
+    except Exception as e:
+        print(f"History error: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@api_bp.route('/history/rates/<string:code>', methods=['GET'])
+def get_rate_history(code):
+    """Get one currency's exchange rate history (?from=&to=&bucket=)"""
+    return _history('rates', code.upper())
+
+
+@api_bp.route('/history/gdp/<string:name>', methods=['GET'])
+def get_gdp_history(name):
+    """Get one country's estimated GDP history (?from=&to=&bucket=)"""
+    return _history('gdp', name)
+
+
+@api_bp.route('/export/<string:table>.<string:fmt>', methods=['GET'])
+def export_table(table, fmt):
+    """Download the countries or rates table as csv, ndjson, npz, arrow or parquet (Range supported)"""
+    try:
+        if table not in EXPORT_TABLES:
+            return jsonify({"error": "Unknown export table", "tables": list(EXPORT_TABLES)}), 404
+        formats = ExportService.formats()
+        if fmt not in formats:
+            return jsonify({"error": "Unknown export format", "formats": formats}), 404
+        
+        export = ExportService.get_export(table, fmt)
+        if export is None:
+            return jsonify({"error": "Exchange rates not available"}), 503
+        
+        path, etag, mimetype = export
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            as_attachment=True,
+            download_name=f"{table}.{fmt}",
+            conditional=True,
+            etag=etag
+        )
+        response.headers['Cache-Control'] = Config.CACHE_CONTROL
+        return response
+        
+    except Exception as e:
+        print(f"Export error: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _admin_denied():
+    """404 unless ADMIN_TOKEN is configured, 403 unless X-Admin-Token matches it"""
+    if not Config.ADMIN_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Forbidden"}), 403
+    return None
+
+
+@api_bp.route('/admin/profile', methods=['POST'])
+def start_profile():
+    """Sample this worker's stacks for ?seconds=N (default 10); returns 202 with the profile id"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval_ms', Config.PROFILE_INTERVAL_MS))
+    except ValueError:
+        return jsonify({"error": "Validation failed", "details": {"seconds": "must be a number"}}), 400
+    
+    details = {}
+    if not 0 < seconds <= Config.PROFILE_MAX_SECONDS:
+        details["seconds"] = f"must be greater than 0 and at most {Config.PROFILE_MAX_SECONDS:g}"
+    if not 1 <= interval_ms <= 1000:
+        details["interval_ms"] = "must be between 1 and 1000"
+    if details:
+        return jsonify({"error": "Validation failed", "details": details}), 400
+    
+    profile_id = profiler.start(seconds, interval_ms / 1000)
+    if profile_id is None:
+        return jsonify({"error": "A profile is already running in this worker"}), 409
+    
+    return jsonify({
+        "profile_id": profile_id,
+        "worker_pid": os.getpid(),
+        "seconds": seconds,
+        "status_url": f"/admin/profile/{profile_id}"
+    }), 202
+
+
+@api_bp.route('/admin/profile/<string:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Download a finished profile in collapsed stack format (flamegraph.pl, speedscope)"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    
+    status, path = profiler.status(profile_id)
+    if status is None:
+        return jsonify({"error": "Profile not found"}), 404
+    if status == 'running':
+        return jsonify({"profile_id": profile_id, "status": "running"}), 202
+    
+    return send_file(path, mimetype='text/plain', as_attachment=True, download_name=f"{profile_id}.folded")
+
+
+@api_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Get result and response cache hit/miss/eviction counters for this worker"""
+    return jsonify({**result_cache.stats(), "responses": response_cache.stats()}), 200
+
+
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Get Prometheus metrics summed across all workers"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @api_bp.route('/countries/refresh', methods=['POST'])
 def refresh_countries():
     """Fetch and cache all countries and exchange rates"""
     try:
-        count = CountryService.fetch_and_refresh()
+        # Concurrent refreshes from any worker join the job already running
+        job, joined = JobService.start_refresh(
+            force=_flag(request.args.get('force')),
+            offline=_flag(request.args.get('offline'))
+        )
+        
+        if not (_flag(request.args.get('async')) or Config.REFRESH_ASYNC):
+            # At most REFRESH_WAIT_TIMEOUT; a job still running then gets a 202 as with async=1
+            job = JobService.wait(job['id'])
+            if job is None:
+                raise Exception("Refresh job did not complete")
+        
+        if job['status'] in ACTIVE_STATUSES:
+            return jsonify({
+                "message": "Refresh job joined" if joined else "Refresh job started",
+                "job_id": job['id'],
+                "status": job['status'],
+                "joined": joined,
+                "status_url": f"/countries/refresh/{job['id']}"
+            }), 202
+        
+        if job['status'] != 'succeeded':
+            raise Exception(job['error'] if job and job['error'] else "Refresh job did not complete")
+        
+        result = job['result']
+        if result['unchanged']:
+            message = "Upstream data unchanged, refresh skipped"
+        else:
+            message = "Countries refreshed successfully"
+        
         return jsonify({
-            "message": "Countries refreshed successfully",
-            "count": count
+            "message": message,
+            "job_id": job['id'],
+            **result
         }), 200
         
     except Exception as e:
@@ -84,44 +410,162 @@ def refresh_countries():
             return jsonify({"error": "Internal server error"}), 500
 
 
+@api_bp.route('/countries/refresh/<string:job_id>', methods=['GET'])
+def get_refresh_job(job_id):
+    """Get refresh job status, phase, timings and result"""
+    try:
+        job = JobService.get_job(job_id)
+        
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify(job), 200
+        
+    except Exception as e:
+        print(f"Job status error: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
 @api_bp.route('/countries', methods=['GET'])
 def get_countries():
-    """Get all countries with optional filters and sorting"""
+    """Get all countries with optional filters, sorting, projection and pagination"""
     try:
         region = request.args.get('region')
         currency = request.args.get('currency')
         sort = request.args.get('sort')
+        fields = parse_fields(request.args.get('fields'))
+        limit = parse_limit(request.args.get('limit'))
+        cursor = request.args.get('cursor')
+        
+        etag = _etag_for(_stream_format())
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        # Paginated responses are wrapped; the plain list stays the default
+        if limit or cursor:
+            body = _json_body(etag, lambda: CountryService.get_countries_page(
+                region=region,
+                currency=currency,
+                sort=sort,
+                fields=fields,
+                limit=limit,
+                cursor=cursor
+            ))
+            return _json_response(body, etag), 200
         
-        countries = CountryService.get_countries(
+        stream = _stream_format()
+        if stream:
+            rows = CountryService.stream_countries(
+                region=region,
+                currency=currency,
+                sort=sort,
+                fields=fields
+            )
+            mimetype = 'application/x-ndjson' if stream == 'ndjson' else 'application/json'
+            response = Response(stream_with_context(_stream_rows(rows, stream)), mimetype=mimetype)
+            return _cache_headers(response, etag)
+        
+        body = _json_body(etag, lambda: CountryService.get_countries(
             region=region,
             currency=currency,
-            sort=sort
-        )
+            sort=sort,
+            fields=fields
+        ))
+        
+        return _json_response(body, etag), 200
+        
+    except ValidationError as e:
+        return jsonify({"error": "Validation failed", "details": e.details}), 400
+    except Exception as e:
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@api_bp.route('/countries/lookup', methods=['POST'])
+def lookup_countries():
+    """Resolve many countries by name and/or currency code in one request"""
+    try:
+        names, currencies, fields = parse_lookup(request.get_json(silent=True))
+        result = CountryService.lookup_countries(names, currencies, fields)
+        return jsonify(result), 200
+        
+    except ValidationError as e:
+        return jsonify({"error": "Validation failed", "details": e.details}), 400
+    except Exception as e:
+        print(f"Lookup error: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@api_bp.route('/search', methods=['GET'])
+def search_countries():
+    """Typeahead search over country names and capitals"""
+    try:
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return jsonify({"error": "Validation failed", "details": {"q": "is required"}}), 400
+        limit = parse_limit(request.args.get('limit'), maximum=Config.MAX_SEARCH_LIMIT)
+        fields = parse_fields(request.args.get('fields'))
+        
+        searched = CountryService.search_countries(query, limit, fields)
+        if searched is None:
+            return jsonify({"error": "Search index not available"}), 503
         
-        return jsonify(countries), 200
+        # Tagged with the searched file's version, so MySQL isn't consulted
+        results, version = searched
+        etag = _etag_for(version=version)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
         
+        body = _json_body(etag, lambda: {"query": query, "results": results})
+        return _json_response(body, etag), 200
+        
+    except ValidationError as e:
+        return jsonify({"error": "Validation failed", "details": e.details}), 400
     except Exception as e:
+        print(f"Search error: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
 
+def _serve_image():
+    """Serve the summary image (or a pre-rendered variant) from memory"""
+    try:
+        width = int(request.args['width']) if request.args.get('width') else None
+    except ValueError:
+        return jsonify({"error": "Validation failed", "details": {"width": "must be an integer"}}), 400
+    fmt = (request.args.get('format') or 'png').lower()
+    
+    image = ImageService.get_image(width, fmt) if fmt in IMAGE_MIMETYPES else None
+    if image is None:
+        return jsonify({"error": "Summary image not found"}), 404
+    
+    data, etag, mimetype = image
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    
+    return _cache_headers(Response(data, mimetype=mimetype), etag)
+
+
 @api_bp.route('/countries/<string:name>', methods=['GET'])
 def get_country(name):
     """Get single country by name"""
     try:
         # Special case: if name is 'image', serve the summary image
         if name.lower() == 'image':
-            print(f"Image route triggered. Path: {Config.IMAGE_PATH}")
-            print(f"File exists: {os.path.exists(Config.IMAGE_PATH)}")
-            if not os.path.exists(Config.IMAGE_PATH):
-                return jsonify({"error": "Summary image not found"}), 404
-            return send_file(Config.IMAGE_PATH, mimetype='image/png')
+            return _serve_image()
+        
+        etag = _etag_for(name.lower())
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
         
-        country = CountryService.get_country_by_name(name)
+        body = _json_body(etag, lambda: CountryService.get_country_by_name(name))
         
-        if not country:
+        if body is None:
             return jsonify({"error": "Country not found"}), 404
         
-        return jsonify(country), 200
+        return _json_response(body, etag), 200
         
     except Exception as e:
         print(f"Error in get_country: {e}")
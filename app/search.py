@@ -0,0 +1,188 @@
+import threading
+import unicodedata
+from bisect import bisect_left
+import numpy as np
+
+# Match kinds in rank order; fuzzy matches come last
+MATCH_RANKS = (
+    'name_exact', 'name_prefix', 'name_word_prefix',
+    'capital_exact', 'capital_prefix', 'capital_word_prefix',
+    'fuzzy'
+)
+
+# Shortest query that gets typo-tolerant matching
+FUZZY_MIN_LENGTH = 3
+# Fuzzy candidates (by shared trigrams) checked with edit distance
+FUZZY_CANDIDATES = 64
+
+
+def normalize(text):
+    """Case-fold, strip accents and punctuation, collapse whitespace"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    kept = ''.join(
+        char if char.isalnum() else ' '
+        for char in decomposed if not unicodedata.combining(char)
+    )
+    return ' '.join(kept.split())
+
+
+def _trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance (adjacent swaps cost 1), capped at
+    limit + 1. Only the diagonal band of width 2 * limit + 1 is computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if a == b:
+        return 0
+
+    beyond = limit + 1
+    previous2 = None
+    previous = [j if j <= limit else beyond for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [beyond] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        row_best = current[0]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = previous[j - 1] + (a[i - 1] != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] + 1 < value:
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < row_best:
+                row_best = value
+        if row_best > limit:
+            return beyond
+        previous2, previous = previous, current
+    return min(previous[-1], beyond)
+
+
+class _PrefixList:
+    """Sorted (key, row position) pairs; a prefix is one contiguous range"""
+
+    def __init__(self, pairs):
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.positions = [position for _, position in pairs]
+
+    def scan(self, prefix):
+        index = bisect_left(self.keys, prefix)
+        while index < len(self.keys) and self.keys[index].startswith(prefix):
+            yield self.keys[index], self.positions[index]
+            index += 1
+
+
+class SearchIndex:
+    """
+    Prefix and typo-tolerant search over country names and capitals.
+
+    Prefix lookups use sorted key lists (a flattened trie: each prefix is a
+    bisect plus a contiguous scan); typos are caught by trigram candidates
+    re-scored with edit distance. Built per worker from the dataset file
+    and rebuilt when a refresh publishes a new one.
+    """
+
+    _current = None
+    _lock = threading.Lock()
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        names = [normalize(name) for name in dataset.column('name')]
+        capitals = [normalize(capital) if capital else '' for capital in dataset.column('capital')]
+
+        self._exact = {'name': {}, 'capital': {}}
+        self._lists = {}
+        self._grams = {}
+        self._texts = {'name': names, 'capital': capitals}
+        for field, texts in self._texts.items():
+            whole, words = [], []
+            for position, text in enumerate(texts):
+                if not text:
+                    continue
+                self._exact[field].setdefault(text, position)
+                whole.append((text, position))
+                words.extend((word, position) for word in text.split()[1:])
+                for gram in _trigrams(text):
+                    self._grams.setdefault(gram, []).append(position)
+            self._lists[f'{field}_prefix'] = _PrefixList(whole)
+            self._lists[f'{field}_word_prefix'] = _PrefixList(words)
+        self._grams = {gram: np.array(positions, dtype=np.int32) for gram, positions in self._grams.items()}
+
+    @classmethod
+    def current(cls, dataset):
+        """Index over a dataset (CountryDataset.current()), or None if there is none"""
+        if dataset is None:
+            return None
+        index = cls._current
+        if index is None or index.dataset is not dataset:
+            with cls._lock:
+                if cls._current is None or cls._current.dataset is not dataset:
+                    cls._current = cls(dataset)
+                index = cls._current
+        return index
+
+    def search(self, query, limit):
+        """Ranked [(row position, match kind)] for a query, best first"""
+        text = normalize(query)
+        if not text:
+            return []
+
+        found = {}
+
+        def add(position, kind):
+            if position not in found and len(found) < limit:
+                found[position] = kind
+            return len(found) >= limit
+
+        for field in ('name', 'capital'):
+            position = self._exact[field].get(text)
+            if position is not None and add(position, f'{field}_exact'):
+                return list(found.items())
+            for kind in (f'{field}_prefix', f'{field}_word_prefix'):
+                for _, position in self._lists[kind].scan(text):
+                    if add(position, kind):
+                        return list(found.items())
+
+        if len(text) >= FUZZY_MIN_LENGTH:
+            for position in self._fuzzy(text, set(found)):
+                if add(position, 'fuzzy'):
+                    break
+        return list(found.items())
+
+    def _fuzzy(self, text, exclude):
+        """Positions within a length-scaled edit distance, closest first"""
+        limit = 1 if len(text) <= 4 else 2
+        grams = _trigrams(text)
+        postings = [self._grams[gram] for gram in grams if gram in self._grams]
+        if not postings:
+            return []
+        shared = np.bincount(np.concatenate(postings), minlength=len(self._texts['name']))
+        if exclude:
+            shared[list(exclude)] = 0
+
+        # Each edit touches at most 3 trigrams (one more for a cut-off prefix)
+        shared[shared < max(1, len(grams) - 3 * limit - 1)] = 0
+        count = min(FUZZY_CANDIDATES, np.count_nonzero(shared))
+        candidates = np.argpartition(-shared, count - 1)[:count] if count else []
+
+        scored = []
+        for position in candidates:
+            best = limit + 1
+            for field_text in (self._texts['name'][position], self._texts['capital'][position]):
+                if not field_text:
+                    continue
+                # Whole text, each word, and the same-length prefix (typeahead)
+                for target in [field_text, field_text[:len(text)]] + field_text.split():
+                    best = min(best, _edit_distance(text, target, limit))
+            if best <= limit:
+                scored.append((best, -int(shared[position]), int(position)))
+        return [position for _, _, position in sorted(scored)]
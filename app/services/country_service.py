@@ -1,104 +1,273 @@
-import requests
+import os
 import random
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from app.config import Config
+from app.dataset import CountryDataset
+from app.metrics import metrics
 from app.models import Country
+from app.search import SearchIndex
 from app.services.exchange_service import ExchangeService
+from app.services.history_service import HistoryService
 from app.services.image_service import ImageService
+from app.services.snapshot_service import SnapshotService
+
+
+_NO_CURRENCY = ({},)
+
+
+def _elapsed_ms(start):
+    """Milliseconds since a perf_counter() start"""
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _record_refresh(outcome, timings, write_counts=None):
+    """Report a finished refresh's phase timings and row counts to metrics"""
+    metrics.inc('refresh_total', outcome=outcome)
+    for key, elapsed_ms in timings.items():
+        metrics.observe('refresh_phase_duration_seconds', elapsed_ms / 1000, phase=key[:-3])
+    if write_counts:
+        for kind in ('inserted', 'updated'):
+            metrics.inc('refresh_rows_written_total', write_counts[kind], kind=kind)
+
 
 class CountryService:
     """Service for country data operations"""
     
     @staticmethod
-    def fetch_and_refresh():
-        """Fetch countries and exchange rates, then cache in database"""
+    def fetch_countries(offline=False):
+        """Fetch the countries payload as a snapshot (conditional request)"""
         try:
-            # Fetch countries data
-            countries_response = requests.get(
+            return SnapshotService.fetch(
+                'countries',
                 Config.COUNTRIES_API_URL,
-                timeout=Config.API_TIMEOUT
+                timeout=Config.COUNTRIES_API_TIMEOUT,
+                offline=offline
             )
-            countries_response.raise_for_status()
-            countries_data = countries_response.json()
             
-        except requests.exceptions.RequestException as e:
+        except Exception as e:
             raise Exception(f"Could not fetch data from REST Countries API: {str(e)}")
+    
+    @staticmethod
+    def fetch_sources(timings, offline=False):
+        """Fetch country and exchange rate snapshots concurrently"""
+        def timed(key, func):
+            start = time.perf_counter()
+            try:
+                return func()
+            finally:
+                timings[key] = _elapsed_ms(start)
         
-        try:
-            # Fetch exchange rates
-            exchange_rates = ExchangeService.fetch_exchange_rates()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            countries_future = executor.submit(
+                timed, 'countries_fetch_ms',
+                lambda: CountryService.fetch_countries(offline=offline)
+            )
+            rates_future = executor.submit(
+                timed, 'exchange_fetch_ms',
+                lambda: ExchangeService.fetch_rates_snapshot(offline=offline)
+            )
             
-        except Exception as e:
-            raise Exception(f"Could not fetch data from Exchange Rate API: {str(e)}")
+            countries_snapshot = countries_future.result()
+            
+            try:
+                rates_snapshot = rates_future.result()
+            except Exception as e:
+                raise Exception(f"Could not fetch data from Exchange Rate API: {str(e)}")
+        
+        timings['fetch_ms'] = _elapsed_ms(start)
+        return countries_snapshot, rates_snapshot
+    
+    @staticmethod
+    def fetch_and_refresh(force=False, offline=False, progress=None):
+        """
+        Fetch countries and exchange rates, then cache in database.
+        
+        Skips processing when both upstream payloads are unchanged since the
+        last successful refresh, unless force is set. With offline set, the
+        stored snapshots are used instead of the network. progress, if
+        given, is called with each phase name as the refresh advances.
+        """
+        offline = offline or Config.OFFLINE_REFRESH
+        report = progress or (lambda phase: None)
+        timings = {}
+        refresh_start = time.perf_counter()
+        
+        report('fetch')
+        countries_snapshot, rates_snapshot = CountryService.fetch_sources(
+            timings, offline=offline
+        )
+        
+        if not (force or countries_snapshot['changed'] or rates_snapshot['changed']):
+            timings['total_ms'] = _elapsed_ms(refresh_start)
+            print(f"Refresh skipped, upstream unchanged: {timings}")
+            if not os.path.exists(Config.DATASET_PATH):
+                Country.publish_dataset()
+            if not os.path.exists(Config.RATES_PATH):
+                CountryService.publish_rates(rates_snapshot)
+            _record_refresh('unchanged', timings)
+            return {
+                "count": Country.count(),
+                "unchanged": True,
+                "timings": timings
+            }
+        
+        countries_data = countries_snapshot['payload']
+        exchange_rates = rates_snapshot['payload'].get('rates', {})
+        
+        report('process')
+        phase_start = time.perf_counter()
         
         # Process countries data
-        processed_countries = []
         current_time = datetime.now()
+        processed_countries = CountryService.process_countries(
+            countries_data, exchange_rates, current_time, seed=Config.GDP_SEED
+        )
         
-        for country in countries_data:
-            name = country.get('name')
-            capital = country.get('capital')
-            region = country.get('region')
-            population = country.get('population')
-            flag_url = country.get('flag')
-            currencies = country.get('currencies', [])
-            
-            # Validation: name and population are required
-            if not name or population is None:
-                continue
-            
-            # Currency handling
-            currency_code = None
-            exchange_rate = None
-            estimated_gdp = 0
-            
-            if currencies and len(currencies) > 0:
-                # Get first currency code
-                currency_code = currencies[0].get('code')
-                
-                if currency_code:
-                    # Get exchange rate
-                    exchange_rate = exchange_rates.get(currency_code)
-                    
-                    if exchange_rate:
-                        # Calculate estimated GDP
-                        random_multiplier = random.uniform(1000, 2000)
-                        estimated_gdp = (population * random_multiplier) / exchange_rate
-                    else:
-                        # Currency not found in exchange rates
-                        exchange_rate = None
-                        estimated_gdp = None
-            
-            processed_countries.append((
-                name,
-                capital,
-                region,
-                population,
-                currency_code,
-                exchange_rate,
-                estimated_gdp,
-                flag_url,
-                current_time
-            ))
+        timings['process_ms'] = _elapsed_ms(phase_start)
         
         # Batch upsert to database
+        report('upsert')
+        phase_start = time.perf_counter()
+        write_counts = {"inserted": 0, "updated": 0, "unchanged": 0, "total": None}
         if processed_countries:
-            Country.upsert_batch(processed_countries)
-            Country.update_refresh_timestamp()
+            write_counts = Country.upsert_changed(processed_countries, refreshed_at=current_time)
+        timings['upsert_ms'] = _elapsed_ms(phase_start)
+        
+        # Append-only history of rates and GDP
+        report('history')
+        phase_start = time.perf_counter()
+        try:
+            HistoryService.record_refresh(current_time, exchange_rates, processed_countries)
+        except Exception as e:
+            print(f"Error recording history: {e}")
+            # The refresh itself already succeeded
+        timings['history_ms'] = _elapsed_ms(phase_start)
+        
+        # Memory-mapped copy for the read endpoints in every worker
+        report('publish')
+        phase_start = time.perf_counter()
+        Country.publish_dataset()
+        CountryService.publish_rates(rates_snapshot)
+        timings['publish_ms'] = _elapsed_ms(phase_start)
+        
+        # Only remember payloads once they are safely stored
+        for snapshot in (countries_snapshot, rates_snapshot):
+            if snapshot['changed'] and not offline:
+                SnapshotService.save(snapshot)
         
         # Generate summary image
+        report('image')
+        phase_start = time.perf_counter()
         try:
-            ImageService.generate_summary_image()
+            ImageService.generate_summary_image(
+                summary=Country.get_summary(),
+                last_refresh=current_time
+            )
         except Exception as e:
             print(f"Error generating image: {e}")
             # Don't fail the entire refresh if image generation fails
+        timings['image_ms'] = _elapsed_ms(phase_start)
         
-        return len(processed_countries)
+        timings['total_ms'] = _elapsed_ms(refresh_start)
+        print(f"Refresh timings: {timings}")
+        _record_refresh('succeeded', timings, write_counts)
+        
+        return {
+            "count": len(processed_countries),
+            "unchanged": False,
+            "rows": write_counts,
+            "timings": timings
+        }
     
     @staticmethod
-    def get_countries(region=None, currency=None, sort=None):
-        """Get countries with filters and sorting"""
-        return Country.get_all(region=region, currency=currency, sort=sort)
+    def publish_rates(rates_snapshot):
+        """Publish the full rate table as a cross-rate matrix for /convert"""
+        try:
+            ExchangeService.publish_rate_table(
+                rates_snapshot['payload'].get('rates', {}),
+                as_of=rates_snapshot.get('fetched_at')
+            )
+        except Exception as e:
+            # Conversions keep using the previous table
+            print(f"Error publishing rate table: {e}")
+    
+    @staticmethod
+    def gdp_multipliers(seed=None):
+        """
+        Get a name -> GDP multiplier (1000-2000) function.
+        
+        With a seed each multiplier is a CRC-32 of the country name started
+        from the seed's, so it depends only on the seed and that country:
+        adding, removing or reordering upstream records leaves every other
+        estimate unchanged. seed=None draws fresh multipliers, as before.
+        """
+        if seed is None:
+            return lambda name: random.uniform(1000, 2000)
+        
+        start = zlib.crc32(str(seed).encode())
+        crc32 = zlib.crc32
+        return lambda name: 1000 + crc32(name.encode(), start) / 2 ** 32 * 1000
+    
+    @staticmethod
+    def process_countries(countries_data, exchange_rates, refreshed_at, seed=None):
+        """
+        Turn upstream country records into upsert tuples, in one pass.
+        
+        Only the first currency is stored. No currency gives GDP 0; a
+        currency without a usable rate gives NULL rate and GDP.
+        Multipliers come from gdp_multipliers(seed).
+        """
+        multiplier = CountryService.gdp_multipliers(seed)
+        get_rate = exchange_rates.get
+        processed = []
+        append = processed.append
+        
+        for country in countries_data:
+            name = country.get('name')
+            population = country.get('population')
+            # Validation: name and population are required
+            if not name or population is None:
+                continue
+            
+            code = (country.get('currencies') or _NO_CURRENCY)[0].get('code')
+            if code:
+                rate = get_rate(code) or None
+                estimated_gdp = population * multiplier(name) / rate if rate else None
+            else:
+                rate = None
+                estimated_gdp = 0
+            
+            append((
+                name, country.get('capital'), country.get('region'), population, code,
+                rate, estimated_gdp, country.get('flag'), refreshed_at
+            ))
+        return processed
+    
+    @staticmethod
+    def get_countries(region=None, currency=None, sort=None, fields=None):
+        """Get countries with filters, sorting and optional projection"""
+        return Country.get_all(region=region, currency=currency, sort=sort, fields=fields)
+    
+    @staticmethod
+    def stream_countries(region=None, currency=None, sort=None, fields=None):
+        """Iterate countries straight from the database without buffering"""
+        return Country.iter_all(region=region, currency=currency, sort=sort, fields=fields)
+    
+    @staticmethod
+    def get_countries_page(region=None, currency=None, sort=None, fields=None, limit=None, cursor=None):
+        """Get one keyset-paginated page of countries"""
+        return Country.get_page(
+            region=region,
+            currency=currency,
+            sort=sort,
+            fields=fields,
+            limit=limit or Config.DEFAULT_PAGE_SIZE,
+            cursor=cursor
+        )
     
     @staticmethod
     def get_country_by_name(name):
@@ -108,18 +277,75 @@ class CountryService:
             return None
         return country
     
+    @staticmethod
+    def lookup_countries(names=(), currencies=(), fields=None):
+        """Resolve many names and currency codes in one pass, reporting misses"""
+        by_name, by_currency = Country.get_many(names, currencies)
+        
+        def project(row):
+            return {field: row[field] for field in fields} if fields else row
+        
+        return {
+            "countries": {name: project(row) if row else None for name, row in by_name.items()},
+            "missing": [name for name, row in by_name.items() if row is None],
+            "currencies": {
+                code: [project(row) for row in rows] for code, rows in by_currency.items()
+            }
+        }
+    
+    @staticmethod
+    def search_countries(query, limit=None, fields=None):
+        """
+        Prefix and typo-tolerant search, best matches first.
+        
+        Served entirely from the in-memory index over the published dataset
+        file, which is not checked against refresh_metadata: search never
+        waits on MySQL. Returns (results, the file's data version), or None
+        when no dataset file is published.
+        """
+        index = SearchIndex.current(CountryDataset.current())
+        if index is None:
+            return None
+        
+        matches = index.search(query, limit or Config.DEFAULT_SEARCH_LIMIT)
+        rows = index.dataset.materialize([position for position, _ in matches])
+        if fields:
+            rows = [{field: row[field] for field in fields} for row in rows]
+        return [{**row, "match": kind} for row, (_, kind) in zip(rows, matches)], index.dataset.version
+    
     @staticmethod
     def delete_country(name):
         """Delete country by name"""
         return Country.delete_by_name(name)
     
+    @staticmethod
+    def get_data_version():
+        """Get the (last refresh, delete count) pair that versions all reads"""
+        return Country.get_data_version()
+    
+    @staticmethod
+    def get_stats(group=None, top=None):
+        """
+        Get precomputed statistics: the whole summary, or one grouping
+        ('regions' or 'currencies') with top-N lists cut to top entries.
+        """
+        summary = Country.get_summary()
+        if group is None:
+            return summary
+        
+        groups = summary[group]
+        if top is not None:
+            groups = [{**stats, "top_by_gdp": stats['top_by_gdp'][:top]} for stats in groups]
+        return groups
+    
     @staticmethod
     def get_status():
-        """Get API status"""
-        total = Country.count()
-        last_refresh = Country.get_last_refresh()
+        """Get API status from the maintained counters (no COUNT(*))"""
+        status = Country.get_status()
+        last_refresh = status['last_refreshed_at']
         
         return {
-            "total_countries": total,
+            "total_countries": status['country_count'],
+            "generation": status['generation'],
             "last_refreshed_at": last_refresh.isoformat() + 'Z' if last_refresh else None
         }
\ No newline at end of file
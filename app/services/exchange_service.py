@@ -1,23 +1,150 @@
+import math
+import os
+import threading
+import numpy as np
 import requests
 from app.config import Config
+from app.services.snapshot_service import SnapshotService
+from app.utils.files import atomic_write
+from app.utils.validators import ValidationError
+
+class RateTable:
+    """
+    Dense cross-rate matrix built from a USD-based rate table.
+    
+    matrix[i, j] is the amount of codes[j] one unit of codes[i] buys, so a
+    batch of conversions is a single fancy-indexed lookup.
+    """
+    
+    def __init__(self, codes, matrix, as_of=None):
+        self.codes = list(codes)
+        self.index = {code: position for position, code in enumerate(self.codes)}
+        self.matrix = matrix
+        self.as_of = as_of
+    
+    @classmethod
+    def build(cls, rates, as_of=None):
+        """Build from {code: units per USD}, skipping unusable rates"""
+        usable = sorted(
+            (code.upper(), float(rate)) for code, rate in rates.items()
+            if isinstance(rate, (int, float)) and math.isfinite(rate) and rate > 0
+        )
+        codes = [code for code, _ in usable]
+        per_usd = np.array([rate for _, rate in usable], dtype=np.float64)
+        # from A to B: divide by A's rate to get USD, multiply by B's
+        matrix = per_usd[np.newaxis, :] / per_usd[:, np.newaxis]
+        return cls(codes, matrix, as_of)
+    
+    def save(self, path):
+        """Write atomically"""
+        with atomic_write(path, 'wb') as f:
+            np.savez(
+                f,
+                codes=np.array(self.codes, dtype=str),
+                matrix=self.matrix,
+                as_of=np.array(self.as_of or '', dtype=str)
+            )
+    
+    @classmethod
+    def load(cls, path):
+        """Read a table written by save()"""
+        with np.load(path) as data:
+            return cls(data['codes'].tolist(), data['matrix'], str(data['as_of']) or None)
+    
+    def convert(self, sources, targets, amounts):
+        """
+        Convert amounts[k] from sources[k] to targets[k].
+        
+        Returns (rates, results) as lists. Raises ValidationError naming the
+        positions of unknown currency codes.
+        """
+        lookup = self.index.get
+        rows = np.fromiter((lookup(code, -1) for code in sources), dtype=np.intp, count=len(sources))
+        columns = np.fromiter((lookup(code, -1) for code in targets), dtype=np.intp, count=len(targets))
+        
+        errors = {}
+        for key, codes, positions in (('from', sources, rows), ('to', targets, columns)):
+            for position in np.flatnonzero(positions < 0).tolist():
+                errors[f"{position}.{key}"] = f"unknown currency '{codes[position]}'"
+        if errors:
+            raise ValidationError(errors)
+        
+        rates = self.matrix[rows, columns]
+        results = rates * np.asarray(amounts, dtype=np.float64)
+        return rates.tolist(), results.tolist()
+
 
 class ExchangeService:
     """Service for fetching exchange rates"""
     
+    # Rate table loaded from Config.RATES_PATH, reloaded when the file changes
+    _table = None
+    _table_key = None
+    _table_lock = threading.Lock()
+    
     @staticmethod
-    def fetch_exchange_rates():
-        """Fetch exchange rates from external API"""
+    def fetch_rates_snapshot(offline=False):
+        """Fetch the exchange rate payload as a snapshot (conditional request)"""
         try:
-            response = requests.get(
+            return SnapshotService.fetch(
+                'exchange_rates',
                 Config.EXCHANGE_API_URL,
-                timeout=Config.API_TIMEOUT
+                timeout=Config.EXCHANGE_API_TIMEOUT,
+                offline=offline
             )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Extract rates dictionary
-            rates = data.get('rates', {})
-            return rates
             
         except requests.exceptions.RequestException as e:
-            raise Exception(f"Exchange rate API error: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Exchange rate API error: {str(e)}")
+    
+    @staticmethod
+    def fetch_exchange_rates(offline=False):
+        """Fetch exchange rates from external API"""
+        snapshot = ExchangeService.fetch_rates_snapshot(offline=offline)
+        
+        # Extract rates dictionary
+        return snapshot['payload'].get('rates', {})
+    
+    @staticmethod
+    def publish_rate_table(rates, as_of=None):
+        """Build the cross-rate matrix from a full rate table and store it for all workers"""
+        table = RateTable.build(rates, as_of)
+        os.makedirs(os.path.dirname(Config.RATES_PATH), exist_ok=True)
+        table.save(Config.RATES_PATH)
+        return table
+    
+    @staticmethod
+    def get_rate_table():
+        """The latest published rate table, or None before the first refresh"""
+        try:
+            stat = os.stat(Config.RATES_PATH)
+        except OSError:
+            return None
+        
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != ExchangeService._table_key:
+            with ExchangeService._table_lock:
+                if key != ExchangeService._table_key:
+                    ExchangeService._table = RateTable.load(Config.RATES_PATH)
+                    ExchangeService._table_key = key
+        return ExchangeService._table
+    
+    @staticmethod
+    def convert(sources, targets, amounts):
+        """
+        Convert a batch of amounts between currencies.
+        
+        Returns (results, as_of), or None if no rate table is published yet.
+        Codes are matched case-insensitively.
+        """
+        table = ExchangeService.get_rate_table()
+        if table is None:
+            return None
+        
+        sources = [code.upper() for code in sources]
+        targets = [code.upper() for code in targets]
+        rates, converted = table.convert(sources, targets, amounts)
+        results = [
+            {"from": source, "to": target, "amount": amount, "rate": rate, "result": result}
+            for source, target, amount, rate, result in zip(sources, targets, amounts, rates, converted)
+        ]
+        return results, table.as_of
@@ -0,0 +1,178 @@
+import csv
+import glob
+import hashlib
+import io
+import os
+import numpy as np
+from flask import current_app
+from app.config import Config
+from app.json_provider import ENCODERS
+from app.models import Country
+from app.services.exchange_service import ExchangeService
+from app.utils.files import atomic_write
+from app.utils.validators import SELECTABLE_FIELDS
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Format -> (file extension, mimetype); arrow and parquet need pyarrow
+FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'ndjson': ('ndjson', 'application/x-ndjson'),
+    'npz': ('npz', 'application/octet-stream'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet')
+}
+EXPORT_TABLES = ('countries', 'rates')
+
+INTEGER_FIELDS = ('id', 'population')
+FLOAT_FIELDS = ('exchange_rate', 'estimated_gdp')
+
+RATE_FIELDS = ('currency_code', 'rate')
+
+
+def _text(value):
+    """CSV cell: JSON encoding rules for Decimal/datetime, empty for null"""
+    if value is None:
+        return ''
+    encode = ENCODERS.get(type(value))
+    return encode(value) if encode is not None else value
+
+
+def _write_csv(f, fields, rows):
+    text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_text(row[field]) for field in fields])
+    text.detach()
+
+
+def _write_ndjson(f, fields, rows):
+    dumps = current_app.json.dumps
+    for row in rows:
+        f.write((dumps(row) + "\n").encode('utf-8'))
+
+
+def _columns(fields, rows):
+    """numpy column arrays: nulls are NaN, '' or NaT"""
+    rows = list(rows)
+    columns = {}
+    for field in fields:
+        values = [row[field] for row in rows]
+        if field in INTEGER_FIELDS:
+            columns[field] = np.array(values, dtype=np.int64)
+        elif field in FLOAT_FIELDS or field == 'rate':
+            columns[field] = np.array([np.nan if value is None else float(value) for value in values])
+        elif field == 'last_refreshed_at':
+            columns[field] = np.array(values, dtype='datetime64[us]')
+        else:
+            columns[field] = np.array(['' if value is None else value for value in values], dtype=str)
+    return columns
+
+
+def _write_npz(f, fields, rows):
+    np.savez(f, **_columns(fields, rows))
+
+
+def _arrow_table(fields, rows):
+    """Table with the MySQL column types, so the schema doesn't depend on the data"""
+    types = {
+        'id': pyarrow.int64(),
+        'population': pyarrow.int64(),
+        'exchange_rate': pyarrow.decimal128(15, 6),
+        'estimated_gdp': pyarrow.decimal128(20, 2),
+        'last_refreshed_at': pyarrow.timestamp('us'),
+        'rate': pyarrow.float64()
+    }
+    rows = list(rows)
+    return pyarrow.table({
+        field: pyarrow.array([row[field] for row in rows], type=types.get(field, pyarrow.string()))
+        for field in fields
+    })
+
+
+def _write_arrow(f, fields, rows):
+    table = _arrow_table(fields, rows)
+    with pyarrow.ipc.new_file(f, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _write_parquet(f, fields, rows):
+    pyarrow.parquet.write_table(_arrow_table(fields, rows), f)
+
+
+WRITERS = {
+    'csv': _write_csv,
+    'ndjson': _write_ndjson,
+    'npz': _write_npz,
+    'arrow': _write_arrow,
+    'parquet': _write_parquet
+}
+
+
+class ExportService:
+    """Bulk exports of the countries and rate tables, written once per data version"""
+    
+    @staticmethod
+    def formats():
+        """Export formats available in this installation"""
+        if pyarrow is None:
+            return [fmt for fmt in FORMATS if fmt not in ('arrow', 'parquet')]
+        return list(FORMATS)
+    
+    @staticmethod
+    def _source(table):
+        """(version key, fields, row iterator factory) for a table, or None if it has no data yet"""
+        if table == 'countries':
+            version = Country.get_data_version()
+            return repr(version), SELECTABLE_FIELDS, Country.iter_all
+        
+        rate_table = ExchangeService.get_rate_table()
+        if rate_table is None or 'USD' not in rate_table.index:
+            return None
+        per_usd = rate_table.matrix[rate_table.index['USD']].tolist()
+        
+        def rows():
+            return (
+                {"currency_code": code, "rate": rate}
+                for code, rate in zip(rate_table.codes, per_usd)
+            )
+        return repr((rate_table.as_of, rate_table.codes)), RATE_FIELDS, rows
+    
+    @staticmethod
+    def get_export(table, fmt):
+        """
+        Get (path, etag, mimetype) of a table's export, writing it if the
+        data changed since the last one. None if the table has no data yet.
+        
+        Files are named by a hash of the data version, so every worker
+        serves (and at most briefly duplicates) the same file; exports of
+        older versions are removed once a new one is in place.
+        """
+        source = ExportService._source(table)
+        if source is None:
+            return None
+        version_key, fields, rows = source
+        
+        extension, mimetype = FORMATS[fmt]
+        etag = hashlib.sha1(f"{table}|{fmt}|{version_key}".encode()).hexdigest()
+        path = os.path.join(Config.EXPORT_DIR, f"{table}-{etag[:16]}.{extension}")
+        
+        if not os.path.exists(path):
+            os.makedirs(Config.EXPORT_DIR, exist_ok=True)
+            with atomic_write(path, 'wb') as f:
+                WRITERS[fmt](f, fields, rows())
+            
+            for stale in glob.glob(os.path.join(Config.EXPORT_DIR, f"{table}-*.{extension}")):
+                if stale != path:
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+        
+        return path, etag, mimetype
@@ -0,0 +1,58 @@
+from datetime import date, datetime
+from app.models import History
+
+
+def _iso(value):
+    """ISO-8601 for bucket starts and timestamps (UTC, with Z)"""
+    if isinstance(value, datetime):
+        return value.isoformat() + 'Z'
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).isoformat() + 'Z'
+    return datetime.fromisoformat(value).isoformat() + 'Z'
+
+
+class HistoryService:
+    """Service for exchange rate and GDP history"""
+    
+    @staticmethod
+    def record_refresh(refreshed_at, rates, countries_data):
+        """Append one refresh's full rate table and per-country GDP"""
+        return History.append(refreshed_at, rates, countries_data)
+    
+    @staticmethod
+    def get_series(series, key, start, end, bucket=None):
+        """
+        Get one currency's ('rates') or country's ('gdp') history.
+        
+        Without a bucket every refresh is a point; with one, points are
+        per-bucket avg/min/max/last and sample counts.
+        """
+        points, truncated = History.get_series(series, key, start, end, bucket)
+        
+        if bucket:
+            data = [
+                {
+                    "t": _iso(point['bucket']),
+                    "avg": point['avg'],
+                    "min": point['min'],
+                    "max": point['max'],
+                    "last": point['last'],
+                    "samples": point['samples']
+                }
+                for point in points
+            ]
+        else:
+            data = [
+                {"t": _iso(point.pop('refreshed_at')), **point}
+                for point in points
+            ]
+        
+        return {
+            "series": series,
+            "key": key,
+            "from": _iso(start),
+            "to": _iso(end),
+            "bucket": bucket or 'raw',
+            "points": data,
+            "truncated": truncated
+        }
@@ -0,0 +1,50 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import Config
+from app.profiling import tracer
+
+class HttpService:
+    """Shared keep-alive HTTP session for upstream APIs"""
+
+    _session = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls):
+        """Get the process-wide session, creating it on first use"""
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    cls._session = cls._build_session()
+        return cls._session
+
+    @staticmethod
+    def _build_session():
+        """Build a session with connection pooling and retry/backoff"""
+        retry = Retry(
+            total=Config.API_RETRIES,
+            backoff_factor=Config.API_BACKOFF,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=Config.HTTP_POOL_SIZE,
+            pool_maxsize=Config.HTTP_POOL_SIZE,
+            max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @classmethod
+    def get(cls, url, timeout, **kwargs):
+        """GET through the shared session"""
+        with tracer.span('http', url) as span:
+            response = cls.get_session().get(url, timeout=timeout, **kwargs)
+            span.set(status=response.status_code, bytes=len(response.content))
+            return response
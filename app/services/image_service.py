@@ -1,20 +1,75 @@
 from PIL import Image, ImageDraw, ImageFont
 from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
 from app.models import Country
 from app.config import Config
+from app.profiling import tracer
+from app.utils.files import atomic_write
+import hashlib
 import os
+import threading
+
+IMAGE_MIMETYPES = {
+    'png': 'image/png',
+    'webp': 'image/webp'
+}
 
 class ImageService:
     """Service for generating summary images"""
     
+    # Served image bytes keyed by file path: (mtime_ns, size, data, etag)
+    _bytes_cache = {}
+    _bytes_lock = threading.Lock()
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _load_fonts():
+        """Load fonts once per process"""
+        # Try to use a nicer font, fallback to default
+        try:
+            title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 36)
+            header_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
+            body_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
+        except OSError:
+            # Fallback to default font
+            title_font = ImageFont.load_default()
+            header_font = ImageFont.load_default()
+            body_font = ImageFont.load_default()
+        
+        return title_font, header_font, body_font
+    
+    @staticmethod
+    def variant_path(width=None, fmt='png'):
+        """File path of a rendered variant; the full-size PNG is Config.IMAGE_PATH"""
+        if not width and fmt == 'png':
+            return Config.IMAGE_PATH
+        base, _ = os.path.splitext(Config.IMAGE_PATH)
+        suffix = f"-{width}" if width else ""
+        return f"{base}{suffix}.{fmt}"
+    
+    @staticmethod
+    def _save_atomic(image, path, fmt):
+        """Save so readers never see a partial image"""
+        with atomic_write(path, 'wb') as f:
+            image.save(f, format=fmt.upper())
+    
     @staticmethod
-    def generate_summary_image():
-        """Generate summary image with country statistics"""
+    @tracer.traced('image', 'generate_summary_image')
+    def generate_summary_image(summary=None, last_refresh=None):
+        """
+        Generate summary image with country statistics.
+        
+        Totals and the top 5 come from the precomputed summary (see
+        Country.get_summary), so rendering runs no aggregate queries.
+        """
         
         # Get data
-        total_countries = Country.count()
-        top_countries = Country.get_top_by_gdp(5)
-        last_refresh = Country.get_last_refresh()
+        if summary is None:
+            summary = Country.get_summary()
+            last_refresh = Country.get_last_refresh()
+        total_countries = summary['total_countries']
+        top_countries = summary['top_by_gdp'][:5]
         
         # Image dimensions and colors
         width = 800
@@ -28,16 +83,7 @@ class ImageService:
         image = Image.new('RGB', (width, height), bg_color)
         draw = ImageDraw.Draw(image)
         
-        # Try to use a nicer font, fallback to default
-        try:
-            title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 36)
-            header_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-            body_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
-        except:
-            # Fallback to default font
-            title_font = ImageFont.load_default()
-            header_font = ImageFont.load_default()
-            body_font = ImageFont.load_default()
+        title_font, header_font, body_font = ImageService._load_fonts()
         
         y_offset = 40
         
@@ -58,7 +104,7 @@ class ImageService:
         
         for idx, country in enumerate(top_countries, 1):
             country_name = country['name']
-            gdp = country['estimated_gdp']
+            gdp = Decimal(country['estimated_gdp'])
             gdp_formatted = f"${gdp:,.2f}" if gdp else "N/A"
             
             country_text = f"{idx}. {country_name}: {gdp_formatted}"
@@ -76,7 +122,43 @@ class ImageService:
         draw.text((50, y_offset), refresh_text, fill=text_color, font=body_font)
         
         # Save image
-        os.makedirs('cache', exist_ok=True)
-        image.save(Config.IMAGE_PATH)
+        os.makedirs(os.path.dirname(Config.IMAGE_PATH), exist_ok=True)
+        ImageService._save_atomic(image, Config.IMAGE_PATH, 'png')
+        
+        # Optional pre-rendered variants
+        for variant_width in (None,) + Config.IMAGE_VARIANT_WIDTHS:
+            variant = image
+            if variant_width:
+                variant_height = round(height * variant_width / width)
+                variant = image.resize((variant_width, variant_height), Image.LANCZOS)
+            for fmt in Config.IMAGE_VARIANT_FORMATS:
+                if variant_width or fmt != 'png':
+                    ImageService._save_atomic(variant, ImageService.variant_path(variant_width, fmt), fmt)
+        
+        return Config.IMAGE_PATH
+    
+    @staticmethod
+    def get_image(width=None, fmt='png'):
+        """
+        Get a rendered image as (bytes, etag, mimetype), or None if absent.
+        
+        Bytes are kept in memory and only re-read when the file's mtime or
+        size changes, so repeat requests cost one stat().
+        """
+        path = ImageService.variant_path(width, fmt)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        
+        cached = ImageService._bytes_cache.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2], cached[3], IMAGE_MIMETYPES[fmt]
+        
+        with open(path, 'rb') as f:
+            data = f.read()
+        etag = hashlib.sha1(data).hexdigest()
         
-        return Config.IMAGE_PATH
\ No newline at end of file
+        with ImageService._bytes_lock:
+            ImageService._bytes_cache[path] = (stat.st_mtime_ns, stat.st_size, data, etag)
+        return data, etag, IMAGE_MIMETYPES[fmt]
@@ -0,0 +1,217 @@
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.config import Config
+from app.metrics import metrics
+from app.services.country_service import CountryService
+from app.utils.files import atomic_write, lock_exclusive
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def _now():
+    """Current UTC time as ISO-8601 with Z"""
+    return datetime.utcnow().isoformat() + 'Z'
+
+
+class JobService:
+    """
+    Background refresh jobs with single-flight locking.
+
+    Job records are JSON files under Config.JOBS_DIR so any gunicorn worker
+    can report on them. The running job holds an exclusive flock on
+    refresh.lock for its whole lifetime; the kernel drops the lock if the
+    worker dies, so a stale record is never mistaken for a live job.
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls):
+        """Get the per-process refresh executor, creating it on first use"""
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix='refresh'
+                    )
+        return cls._executor
+
+    @staticmethod
+    def _path(name):
+        """Path of a file in the jobs directory"""
+        return os.path.join(Config.JOBS_DIR, name)
+
+    @staticmethod
+    def _write(job):
+        """Write a job record atomically"""
+        with atomic_write(JobService._path(f"{job['id']}.json")) as f:
+            json.dump(job, f)
+
+    @staticmethod
+    def _load(job_id):
+        """Read a job record from disk, or None"""
+        # Job ids are uuid hex; reject anything that could escape the directory
+        if not job_id or not job_id.isalnum():
+            return None
+        try:
+            with open(JobService._path(f"{job_id}.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def get_job(job_id):
+        """Get a job record by id, or None"""
+        job = JobService._load(job_id)
+        if job is None or job['status'] not in ACTIVE_STATUSES:
+            return job
+
+        state_fd = os.open(JobService._path('state.lock'), os.O_RDWR | os.O_CREAT)
+        try:
+            lock_exclusive(state_fd)
+            # Re-read under the lock so a job finishing meanwhile isn't misreported
+            job = JobService._load(job_id)
+            if job is None:
+                # Pruned meanwhile
+                return None
+            if job['status'] in ACTIVE_STATUSES and not JobService._refresh_locked():
+                # Owner went away without finishing (worker killed mid-refresh)
+                job['status'] = 'abandoned'
+        finally:
+            os.close(state_fd)
+        return job
+
+    @staticmethod
+    def _refresh_locked():
+        """Check whether some process holds the refresh lock"""
+        fd = os.open(JobService._path('refresh.lock'), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)
+        return False
+
+    @staticmethod
+    def _current_job_id():
+        """Id of the most recently started job, or None"""
+        try:
+            with open(JobService._path('current'), 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _prune():
+        """Delete finished job records older than Config.JOB_RETENTION"""
+        cutoff = time.time() - Config.JOB_RETENTION
+        for entry in os.scandir(Config.JOBS_DIR):
+            if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def start_refresh(force=False, offline=False):
+        """
+        Start a refresh job, or join the one already running.
+
+        Returns (job, joined).
+        """
+        os.makedirs(Config.JOBS_DIR, exist_ok=True)
+
+        state_fd = os.open(JobService._path('state.lock'), os.O_RDWR | os.O_CREAT)
+        try:
+            # Serialize start/join decisions across workers
+            lock_exclusive(state_fd)
+
+            refresh_fd = os.open(JobService._path('refresh.lock'), os.O_RDWR | os.O_CREAT)
+            try:
+                fcntl.flock(refresh_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(refresh_fd)
+                job = JobService._load(JobService._current_job_id())
+                if job is not None:
+                    return job, True
+                raise Exception("Refresh lock is held but no job record was found")
+
+            JobService._prune()
+
+            job = {
+                "id": uuid.uuid4().hex,
+                "status": "queued",
+                "phase": None,
+                "force": force,
+                "offline": offline,
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None
+            }
+            JobService._write(job)
+            with open(JobService._path('current'), 'w', encoding='utf-8') as f:
+                f.write(job['id'])
+        finally:
+            os.close(state_fd)
+
+        try:
+            JobService._get_executor().submit(JobService._run, job, refresh_fd)
+        except Exception:
+            os.close(refresh_fd)
+            raise
+        return job, False
+
+    @staticmethod
+    def _run(job, refresh_fd):
+        """Run a refresh job; releases the refresh lock when done"""
+        def progress(phase):
+            job['phase'] = phase
+            JobService._write(job)
+
+        try:
+            job['status'] = 'running'
+            job['started_at'] = _now()
+            JobService._write(job)
+
+            job['result'] = CountryService.fetch_and_refresh(
+                force=job['force'], offline=job['offline'], progress=progress
+            )
+            job['status'] = 'succeeded'
+        except Exception as e:
+            print(f"Refresh job {job['id']} failed: {e}")
+            metrics.inc('refresh_total', outcome='failed')
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            job['phase'] = None
+            job['finished_at'] = _now()
+            JobService._write(job)
+            os.close(refresh_fd)
+
+    @staticmethod
+    def wait(job_id, timeout=None, interval=0.2):
+        """
+        Poll a job until it leaves the queued/running states, or for at
+        most timeout seconds (Config.REFRESH_WAIT_TIMEOUT by default);
+        returns the job as last seen, or None if it is gone.
+        """
+        if timeout is None:
+            timeout = Config.REFRESH_WAIT_TIMEOUT
+        deadline = time.monotonic() + timeout
+        while True:
+            job = JobService.get_job(job_id)
+            if job is None or job['status'] not in ACTIVE_STATUSES:
+                return job
+            if time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
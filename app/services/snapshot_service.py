@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from app.config import Config
+from app.services.http_service import HttpService
+from app.utils.files import atomic_write
+
+class SnapshotService:
+    """On-disk snapshots of upstream payloads for conditional fetching"""
+
+    @staticmethod
+    def path(source):
+        """Get the snapshot file path for a source"""
+        return os.path.join(Config.SNAPSHOT_DIR, f"{source}.json")
+
+    @staticmethod
+    def load(source):
+        """Load the last stored snapshot for a source, or None"""
+        try:
+            with open(SnapshotService.path(source), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def save(snapshot):
+        """Write a snapshot atomically"""
+        os.makedirs(Config.SNAPSHOT_DIR, exist_ok=True)
+        stored = {key: value for key, value in snapshot.items() if key != 'changed'}
+        with atomic_write(SnapshotService.path(snapshot['source'])) as f:
+            json.dump(stored, f)
+
+    @staticmethod
+    def fetch(source, url, timeout, offline=False):
+        """
+        Fetch a source with a conditional request.
+
+        Returns a snapshot dict whose 'changed' flag is False when upstream
+        answered 304 or returned a byte-identical payload. Raises
+        requests exceptions on network/HTTP errors, and Exception when
+        offline and no snapshot exists.
+        """
+        previous = SnapshotService.load(source)
+
+        if offline:
+            if previous is None:
+                raise Exception(f"No offline snapshot available for {source}")
+            # Offline refreshes always run the full pipeline
+            return {**previous, "changed": True}
+
+        headers = {}
+        if previous and previous.get('url') == url:
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
+
+        response = HttpService.get(url, timeout=timeout, headers=headers)
+
+        if response.status_code == 304 and headers:
+            return {**previous, "changed": False}
+
+        response.raise_for_status()
+        content_hash = hashlib.sha256(response.content).hexdigest()
+
+        if previous and previous.get('url') == url and previous.get('sha256') == content_hash:
+            return {**previous, "changed": False}
+
+        return {
+            "source": source,
+            "url": url,
+            "etag": response.headers.get('ETag'),
+            "last_modified": response.headers.get('Last-Modified'),
+            "sha256": content_hash,
+            "fetched_at": datetime.utcnow().isoformat() + 'Z',
+            "payload": response.json(),
+            "changed": True
+        }
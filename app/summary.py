@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+# Grouped statistics served by the /stats endpoints. Decimal values are
+# kept as strings, the way jsonify renders DECIMAL columns elsewhere.
+
+
+def _median(values):
+    """Median of a sorted list, or None if empty"""
+    if not values:
+        return None
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def _top_by_gdp(rows, top_n):
+    """Highest estimated GDP first; ties go to the lower id"""
+    ranked = sorted(
+        (row for row in rows if row['estimated_gdp'] is not None),
+        key=lambda row: (-row['estimated_gdp'], row['id'])
+    )
+    return [
+        {"name": row['name'], "estimated_gdp": str(row['estimated_gdp'])}
+        for row in ranked[:top_n]
+    ]
+
+
+def _group_stats(rows, top_n):
+    """count, population and GDP statistics for one group of countries"""
+    total_population = sum(row['population'] for row in rows)
+    gdps = sorted(row['estimated_gdp'] for row in rows if row['estimated_gdp'] is not None)
+    median_gdp = _median(gdps)
+    return {
+        "count": len(rows),
+        "total_population": total_population,
+        "mean_population": round(total_population / len(rows), 2),
+        "total_gdp": str(sum(gdps, Decimal(0))),
+        "median_gdp": None if median_gdp is None else str(median_gdp),
+        "top_by_gdp": _top_by_gdp(rows, top_n)
+    }
+
+
+def build_summary(rows, top_n):
+    """
+    Aggregate country rows (dicts as read from MySQL) once per refresh.
+
+    Groups are keyed by region and by currency code; countries without one
+    form a group with a null key, listed last.
+    """
+    summary = {
+        "total_countries": len(rows),
+        "top_by_gdp": _top_by_gdp(rows, top_n)
+    }
+
+    for key, column in (('regions', 'region'), ('currencies', 'currency_code')):
+        groups = {}
+        for row in rows:
+            groups.setdefault(row[column], []).append(row)
+        summary[key] = [
+            {column: value, **_group_stats(members, top_n)}
+            for value, members in sorted(groups.items(), key=lambda item: (item[0] is None, item[0] or ''))
+        ]
+
+    return summary
@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+import fcntl
+import os
+import threading
+import time
+
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """
+    Open a temp file next to path for writing; on success it is renamed
+    over path, so readers see the old file or the new one, never part of
+    one. On failure the temp file is removed and path left untouched.
+    """
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def lock_exclusive(fd, poll_interval=0.01):
+    """
+    Take an exclusive flock on fd, waiting for other holders.
+    
+    Polls with LOCK_NB instead of blocking in flock(): under gevent a
+    blocking flock stalls every greenlet in the worker, while time.sleep
+    yields to them.
+    """
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            time.sleep(poll_interval)
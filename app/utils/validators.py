@@ -0,0 +1,160 @@
+from app.config import Config
+from datetime import datetime, timedelta, timezone
+import math
+
+SELECTABLE_FIELDS = (
+    'id', 'name', 'capital', 'region', 'population', 'currency_code',
+    'exchange_rate', 'estimated_gdp', 'flag_url', 'last_refreshed_at'
+)
+
+
+class ValidationError(Exception):
+    """Invalid request input; details maps field name to problem"""
+    
+    def __init__(self, details):
+        super().__init__(f"Validation failed: {details}")
+        self.details = details
+
+
+def parse_limit(value, maximum=None, name='limit'):
+    """Parse a page size (or other count) query parameter, or None if absent"""
+    if value is None or value == '':
+        return None
+    
+    maximum = maximum or Config.MAX_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValidationError({name: "must be an integer"})
+    
+    if limit < 1 or limit > maximum:
+        raise ValidationError({name: f"must be between 1 and {maximum}"})
+    return limit
+
+
+def parse_fields(value):
+    """Parse a comma-separated fields= projection, or None if absent"""
+    if not value:
+        return None
+    
+    fields = []
+    for field in value.split(','):
+        field = field.strip()
+        if not field or field in fields:
+            continue
+        if field not in SELECTABLE_FIELDS:
+            raise ValidationError({"fields": f"unknown field '{field}'"})
+        fields.append(field)
+    
+    return tuple(fields) or None
+
+
+def _parse_amount(value, key):
+    """A finite number (JSON number or numeric string)"""
+    if isinstance(value, bool):
+        raise ValidationError({key: "must be a number"})
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        raise ValidationError({key: "must be a number"})
+    if not math.isfinite(amount):
+        raise ValidationError({key: "must be a finite number"})
+    return amount
+
+
+def _parse_code(value, key):
+    """A non-empty currency code string"""
+    if not isinstance(value, str) or not value.strip():
+        raise ValidationError({key: "is required"})
+    return value.strip()
+
+
+def parse_conversions(body, maximum=None):
+    """
+    Parse a batch conversion body into (sources, targets, amounts).
+    
+    body is {"conversions": [{"from", "to", "amount"}, ...]}; top-level
+    "from"/"to" act as defaults for entries that omit them.
+    """
+    maximum = maximum or Config.MAX_CONVERSIONS
+    if not isinstance(body, dict) or not isinstance(body.get('conversions'), list):
+        raise ValidationError({"conversions": "must be a list"})
+    
+    conversions = body['conversions']
+    if not conversions or len(conversions) > maximum:
+        raise ValidationError({"conversions": f"must hold between 1 and {maximum} entries"})
+    
+    sources, targets, amounts = [], [], []
+    for position, item in enumerate(conversions):
+        if not isinstance(item, dict):
+            raise ValidationError({f"{position}": "must be an object"})
+        sources.append(_parse_code(item.get('from', body.get('from')), f"{position}.from"))
+        targets.append(_parse_code(item.get('to', body.get('to')), f"{position}.to"))
+        amounts.append(_parse_amount(item.get('amount', 1), f"{position}.amount"))
+    
+    return sources, targets, amounts
+
+
+def _parse_string_list(value, key, maximum):
+    """A list of non-empty strings, deduplicated in order"""
+    if value is None:
+        return []
+    if not isinstance(value, list) or len(value) > maximum:
+        raise ValidationError({key: f"must be a list of at most {maximum} strings"})
+    
+    items = []
+    for item in value:
+        if not isinstance(item, str) or not item.strip():
+            raise ValidationError({key: "must contain only non-empty strings"})
+        if item.strip() not in items:
+            items.append(item.strip())
+    return items
+
+
+def parse_lookup(body, maximum=None):
+    """
+    Parse a batch lookup body into (names, currencies, fields).
+    
+    body is {"names": [...], "currencies": [...], "fields": "a,b"}; fields
+    may also be a list of field names. At least one of names or currencies
+    is required.
+    """
+    maximum = maximum or Config.MAX_LOOKUP_ITEMS
+    if not isinstance(body, dict):
+        raise ValidationError({"body": "must be a JSON object"})
+    
+    names = _parse_string_list(body.get('names'), 'names', maximum)
+    currencies = _parse_string_list(body.get('currencies'), 'currencies', maximum)
+    if not names and not currencies:
+        raise ValidationError({"names": "names or currencies is required"})
+    
+    fields = body.get('fields')
+    if isinstance(fields, list) and all(isinstance(field, str) for field in fields):
+        fields = ','.join(fields)
+    elif fields is not None and not isinstance(fields, str):
+        raise ValidationError({"fields": "must be a comma-separated string or a list of strings"})
+    return names, currencies, parse_fields(fields)
+
+
+def _parse_datetime(value, key):
+    """ISO-8601 date or datetime; aware values are converted to naive UTC"""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValidationError({key: "must be an ISO-8601 date or datetime"})
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_time_range(start, end, days=None):
+    """
+    Parse from/to query parameters into (start, end), start inclusive and
+    end exclusive. Defaults to the last HISTORY_DEFAULT_DAYS days.
+    """
+    days = days or Config.HISTORY_DEFAULT_DAYS
+    end = _parse_datetime(end, 'to') if end else datetime.now() + timedelta(seconds=1)
+    start = _parse_datetime(start, 'from') if start else end - timedelta(days=days)
+    if start >= end:
+        raise ValidationError({"from": "must be before to"})
+    return start, end
@@ -0,0 +1,241 @@
+"""
+Concurrency benchmark: sync gunicorn workers vs the gevent entry point.
+
+Loads a synthetic dataset through the stubbed upstream APIs (see
+bench_load), then serves the app twice with the same number of gunicorn
+workers - `run:app` on sync workers and `run_async:app` on gevent workers -
+and holds 100 to 1000+ concurrent keep-alive connections against each for
+a fixed time. Each connection issues GETs back to back over a mix of
+dataset-served and MySQL-bound endpoints; throughput, latency percentiles
+and failed requests (errors, timeouts, 5xx) are reported per level.
+
+With --no-dataset every read goes to MySQL (DATASET_ENABLED=false), which
+is where the gevent workers' non-blocking pool pays off most.
+
+Needs a MySQL database from the usual DB_* settings; use a dedicated one.
+Every file the app keeps under cache/ goes to a temporary directory.
+
+Usage:
+    python -m benchmarks.bench_async [--size 5000] [--workers 4]
+        [--connections 100,500,1000] [--duration 15] [--no-dataset]
+        [--output bench_async.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import requests
+from benchmarks.bench_load import (
+    BASE_DIR, StubUpstream, free_port, percentile, run_refresh, start_app, use_work_dir
+)
+from benchmarks.bench_processing import synthetic_countries
+
+ENTRY_POINTS = {
+    'sync': ['run:app'],
+    'async': ['run_async:app', '-k', 'gevent', '--worker-connections', '2000']
+}
+# bench_app loads app.config before the entry module runs, so run_async's
+# own DB_USE_PURE default comes too late to pick the patchable driver
+MODE_ENV = {
+    'sync': {},
+    'async': {'DB_USE_PURE': 'true'}
+}
+
+
+def bench_app(entry):
+    """gunicorn app factory: the entry point's app, with its cache files under BENCH_WORK_DIR"""
+    from importlib import import_module
+    use_work_dir(os.environ['BENCH_WORK_DIR'])
+    return import_module(entry).app
+
+
+def start_gunicorn(mode, workers, env):
+    """Serve the app with gunicorn in the given mode; returns (process, port)"""
+    port = free_port()
+    entry, *options = ENTRY_POINTS[mode]
+    module = entry.split(':')[0]
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', f"benchmarks.bench_async:bench_app('{module}')",
+         '--workers', str(workers), '--bind', f"127.0.0.1:{port}",
+         '--backlog', '4096', '--timeout', '120', '--log-level', 'warning', *options],
+        cwd=BASE_DIR, env={**env, **MODE_ENV[mode]}, stdout=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn ({mode}) exited with code {process.returncode}")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/cache/stats", timeout=1)
+            return process, port
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn ({mode}) did not start within 30s")
+
+
+async def _request(connection, port, path, timeout):
+    """One GET over a keep-alive connection, reconnecting if the server closed it"""
+    if connection[0] is None:
+        connection[:] = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    reader, writer = connection
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode())
+    await writer.drain()
+
+    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+
+    if 'content-length' in headers:
+        body = await asyncio.wait_for(reader.readexactly(int(headers['content-length'])), timeout)
+    else:
+        body = await asyncio.wait_for(reader.read(), timeout)
+    if headers.get('connection', '').lower() == 'close' or 'content-length' not in headers:
+        writer.close()
+        connection[:] = [None, None]
+    return status, len(body)
+
+
+async def _load(port, paths, connections, duration, timeout):
+    """Hold connections open for duration seconds; returns per-request results"""
+    results = []
+    deadline = time.monotonic() + duration
+
+    async def client(seed):
+        rng = random.Random(seed)
+        connection = [None, None]
+        while time.monotonic() < deadline:
+            path = rng.choice(paths)
+            start = time.perf_counter()
+            try:
+                status, size = await _request(connection, port, path, timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+                if connection[1] is not None:
+                    connection[1].close()
+                connection[:] = [None, None]
+                status, size = None, 0
+            results.append(((time.perf_counter() - start) * 1000, status, size))
+
+    await asyncio.gather(*(client(seed) for seed in range(connections)))
+    return results
+
+
+def run_level(port, paths, connections, duration, timeout):
+    """Throughput and latency for one concurrency level"""
+    started = time.perf_counter()
+    results = asyncio.run(_load(port, paths, connections, duration, timeout))
+    wall = time.perf_counter() - started
+
+    ok = sorted(latency for latency, status, _ in results if status is not None and status < 500)
+    statuses = {}
+    for _, status, _ in results:
+        key = str(status) if status is not None else 'error'
+        statuses[key] = statuses.get(key, 0) + 1
+    return {
+        "connections": connections,
+        "requests": len(results),
+        "throughput_rps": round(len(ok) / wall, 1),
+        "failed": len(results) - len(ok),
+        "p50_ms": round(percentile(ok, 0.50), 2) if ok else None,
+        "p90_ms": round(percentile(ok, 0.90), 2) if ok else None,
+        "p99_ms": round(percentile(ok, 0.99), 2) if ok else None,
+        "max_ms": round(ok[-1], 2) if ok else None,
+        "statuses": statuses
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--connections', default='100,500,1000')
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--pool-size', type=int, default=20)
+    parser.add_argument('--no-dataset', action='store_true')
+    parser.add_argument('--output', default='bench_async.json')
+    args = parser.parse_args()
+
+    # Every connection is a file descriptor on both ends
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    levels = sorted(int(level) for level in args.connections.split(','))
+    stub = StubUpstream()
+    work_dir = tempfile.mkdtemp(prefix='bench-async-')
+    countries = synthetic_countries(args.size)
+    stub.set_countries(countries)
+
+    # Load the dataset once through the usual single-process server
+    process, base_url = start_app(stub, work_dir)
+    try:
+        requests.post(f"{base_url}/init-db", timeout=60).raise_for_status()
+        run_refresh(base_url)
+    finally:
+        process.terminate()
+        process.wait()
+
+    names = [country['name'] for country in random.Random(args.size).sample(countries, min(args.size, 200))]
+    currencies = sorted({
+        currency['code'] for country in countries for currency in country['currencies'][:1] if 'code' in currency
+    })
+    paths = (
+        [f"/countries/{name}" for name in names]
+        + ['/status', '/countries?limit=20', '/countries?region=Africa&sort=gdp_desc&limit=20']
+        + [f"/history/rates/{code}" for code in currencies[:20]]
+    )
+
+    env = {
+        **os.environ,
+        'BENCH_WORK_DIR': work_dir,
+        'COUNTRIES_API_URL': f"{stub.url}/countries",
+        'EXCHANGE_API_URL': f"{stub.url}/rates",
+        'DB_POOL_SIZE': str(args.pool_size),
+        'DATASET_ENABLED': 'false' if args.no_dataset else 'true'
+    }
+    report = {
+        "started_at": datetime.utcnow().isoformat() + 'Z',
+        "size": args.size,
+        "workers": args.workers,
+        "duration_s": args.duration,
+        "pool_size": args.pool_size,
+        "dataset": not args.no_dataset,
+        "modes": {}
+    }
+    try:
+        for mode in ENTRY_POINTS:
+            process, port = start_gunicorn(mode, args.workers, env)
+            try:
+                # Warm every worker's pool, dataset view and caches
+                run_level(port, paths, args.workers * 8, 2, args.timeout)
+                report["modes"][mode] = []
+                for connections in levels:
+                    result = run_level(port, paths, connections, args.duration, args.timeout)
+                    report["modes"][mode].append(result)
+                    print(f"{mode:5} connections={connections} rps={result['throughput_rps']} "
+                          f"p99={result['p99_ms']}ms failed={result['failed']}")
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        stub.close()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
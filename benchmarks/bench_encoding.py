@@ -0,0 +1,113 @@
+"""
+Encoding benchmark: JSON cost per request for country rows.
+
+Builds synthetic rows shaped like Country.get_all results (Decimal and
+datetime values included) and times, per request:
+
+- flask_default - Flask's default provider, what jsonify used before
+- provider      - app.json_provider.JSONProvider (a cache miss)
+- cached        - building the response from the response cache (a hit),
+                  identity and gzip
+
+plus the one-off gzip (and br, if installed) compression cost and size.
+Needs no database.
+
+Usage:
+    python -m benchmarks.bench_encoding [--sizes 250,5000,25000] [--repeat 20]
+        [--output bench_encoding.json]
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.cache import COMPRESSORS, EncodedBody
+from app.json_provider import JSONProvider
+from benchmarks.bench_processing import synthetic_countries
+
+
+def country_rows(size):
+    """Rows as the models return them"""
+    refreshed_at = datetime(2025, 10, 22, 18, 0, 0)
+    return [
+        {
+            "id": i,
+            "name": country['name'],
+            "capital": country['capital'],
+            "region": country['region'],
+            "population": country['population'],
+            "currency_code": 'NGN',
+            "exchange_rate": Decimal('1600.230000'),
+            "estimated_gdp": Decimal(country['population']) * 1500 / Decimal('1600.23'),
+            "flag_url": country['flag'],
+            "last_refreshed_at": refreshed_at + timedelta(seconds=i)
+        }
+        for i, country in enumerate(synthetic_countries(size), 1)
+    ]
+
+
+def timed(fn, repeat):
+    """Median wall time of fn() in milliseconds"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='250,5000,25000')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default='bench_encoding.json')
+    args = parser.parse_args()
+
+    # The routes' cached path needs a request context
+    from app.routes import _json_response
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    provider = JSONProvider(app)
+
+    report = {"repeat": args.repeat, "sizes": []}
+    for size in (int(size) for size in args.sizes.split(',')):
+        rows = country_rows(size)
+        body = EncodedBody((provider.dumps(rows) + "\n").encode('utf-8'))
+
+        def cached(accept):
+            with app.test_request_context('/countries', headers={'Accept-Encoding': accept}):
+                return _json_response(body, 'etag')
+
+        result = {
+            "size": size,
+            "bytes": len(body.data),
+            "per_request_ms": {
+                "flask_default": timed(lambda: default.dumps(rows).encode('utf-8'), args.repeat),
+                "provider": timed(lambda: provider.dumps(rows).encode('utf-8'), args.repeat),
+                "cached": timed(lambda: cached('identity'), args.repeat),
+                "cached_gzip": timed(lambda: cached('gzip'), args.repeat)
+            },
+            "compression": {
+                coding: {
+                    "ms": timed(lambda: compress(body.data), max(1, args.repeat // 4)),
+                    "bytes": len(compress(body.data))
+                }
+                for coding, compress in COMPRESSORS.items()
+            }
+        }
+        report["sizes"].append(result)
+        timings = result["per_request_ms"]
+        print(f"size={size} default={timings['flask_default']}ms provider={timings['provider']}ms "
+              f"cached={timings['cached']}ms cached_gzip={timings['cached_gzip']}ms")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
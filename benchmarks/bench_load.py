@@ -0,0 +1,246 @@
+"""
+Load benchmark: refresh and read latency against stubbed upstream APIs.
+
+Starts local stand-ins for the REST Countries and exchange rate APIs, then
+runs the app in a subprocess (threaded werkzeug server) pointed at them via
+COUNTRIES_API_URL / EXCHANGE_API_URL. Every file the app keeps under
+cache/ (snapshots, jobs, dataset, rates, exports, metrics, images) goes to
+a temporary directory instead. For each dataset size it measures:
+
+- refresh wall time for a full load and for an identical re-run (force=1,
+  so every row is compared but none rewritten), with upsert throughput
+- latency percentiles and throughput of GET /countries (full list and one
+  page), /countries/<name> and /status under concurrent clients
+
+Needs a MySQL database from the usual DB_* settings; use a dedicated one.
+Sizes run in ascending order: each synthetic dataset extends the previous
+one, so the table holds exactly the current size if it started empty.
+
+Usage:
+    python -m benchmarks.bench_load [--sizes 250,5000,100000] [--clients 8]
+        [--requests 400] [--output bench_load.json]
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from benchmarks.bench_processing import RATES, synthetic_countries
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SERVER = """
+import logging
+import sys
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+from benchmarks.bench_load import use_work_dir
+use_work_dir(sys.argv[2])
+from werkzeug.serving import make_server
+from app import create_app
+make_server('127.0.0.1', int(sys.argv[1]), create_app(), threaded=True).serve_forever()
+"""
+
+
+def use_work_dir(work_dir):
+    """Point every Config path under cache/ at work_dir, keeping the layout"""
+    from app import config
+    cache_dir = os.path.join(config.BASE_DIR, 'cache')
+    for name, value in vars(config.Config).items():
+        if name.isupper() and isinstance(value, str) and value.startswith(cache_dir + os.sep):
+            setattr(config.Config, name, os.path.join(work_dir, os.path.relpath(value, cache_dir)))
+
+
+class StubUpstream:
+    """Serves /countries and /rates with the current synthetic dataset"""
+
+    def __init__(self):
+        self.bodies = {'/rates': json.dumps({'result': 'success', 'rates': RATES}).encode()}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = stub.bodies.get(self.path.split('?')[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def set_countries(self, countries):
+        self.bodies['/countries'] = json.dumps(countries).encode()
+
+    def close(self):
+        self.server.shutdown()
+
+
+def free_port():
+    """Pick an unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_app(stub, work_dir):
+    """Run the app in a subprocess against the stub; returns (process, base_url)"""
+    port = free_port()
+    env = {
+        **os.environ,
+        'COUNTRIES_API_URL': f"{stub.url}/countries",
+        'EXCHANGE_API_URL': f"{stub.url}/rates",
+        'OFFLINE_REFRESH': 'false',
+        'REFRESH_ASYNC': 'false'
+    }
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER, str(port), work_dir],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App server exited with code {process.returncode}")
+        try:
+            requests.get(f"{base_url}/cache/stats", timeout=1)
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("App server did not start within 30s")
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_load(base_url, paths, clients, total):
+    """Issue total GETs over paths from concurrent clients; returns latency stats"""
+    local = threading.local()
+
+    def one(path):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        response = session.get(f"{base_url}{path}", timeout=120)
+        elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, response.status_code, len(response.content)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(executor.map(one, (paths[i % len(paths)] for i in range(total))))
+    wall = time.perf_counter() - wall_start
+
+    latencies = sorted(result[0] for result in results)
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": total,
+        "clients": clients,
+        "throughput_rps": round(total / wall, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p90_ms": round(percentile(latencies, 0.90), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2),
+        "mean_bytes": round(sum(result[2] for result in results) / total),
+        "statuses": statuses
+    }
+
+
+def run_refresh(base_url):
+    """Run one synchronous forced refresh; returns wall time and the app's report"""
+    start = time.perf_counter()
+    response = requests.post(f"{base_url}/countries/refresh?force=1", timeout=3600)
+    wall_ms = (time.perf_counter() - start) * 1000
+    response.raise_for_status()
+    body = response.json()
+
+    rows = body.get('rows') or {}
+    written = rows.get('inserted', 0) + rows.get('updated', 0)
+    upsert_ms = body['timings'].get('upsert_ms') or 0
+    return {
+        "wall_ms": round(wall_ms, 2),
+        "rows": rows,
+        "timings": body['timings'],
+        "upsert_rows_per_s": round(body['count'] / upsert_ms * 1000) if upsert_ms else None,
+        "written_rows_per_s": round(written / upsert_ms * 1000) if upsert_ms else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='250,5000,25000,100000')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--output', default='bench_load.json')
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    stub = StubUpstream()
+    work_dir = tempfile.mkdtemp(prefix='bench-load-')
+    process, base_url = start_app(stub, work_dir)
+
+    report = {
+        "started_at": datetime.utcnow().isoformat() + 'Z',
+        "clients": args.clients,
+        "requests": args.requests,
+        "sizes": []
+    }
+    try:
+        requests.post(f"{base_url}/init-db", timeout=60).raise_for_status()
+
+        for size in sizes:
+            countries = synthetic_countries(size)
+            stub.set_countries(countries)
+
+            result = {"size": size}
+            result["refresh"] = run_refresh(base_url)
+            result["refresh_repeat"] = run_refresh(base_url)
+
+            names = [country['name'] for country in random.Random(size).sample(countries, min(size, 200))]
+            result["latency"] = {
+                "countries": run_load(base_url, ['/countries'], args.clients, max(args.clients, args.requests // 10)),
+                "countries_page": run_load(
+                    base_url, [f"/countries?limit={args.page_size}"], args.clients, args.requests
+                ),
+                "country": run_load(base_url, [f"/countries/{name}" for name in names], args.clients, args.requests),
+                "status": run_load(base_url, ['/status'], args.clients, args.requests)
+            }
+            report["sizes"].append(result)
+            print(f"size={size} refresh={result['refresh']['wall_ms']}ms "
+                  f"country p99={result['latency']['country']['p99_ms']}ms")
+    finally:
+        process.terminate()
+        process.wait()
+        stub.close()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
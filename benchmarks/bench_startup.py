@@ -0,0 +1,72 @@
+"""
+Startup benchmark: cold boot time and first-request latency.
+
+Each run starts a fresh interpreter, times `create_app()` (imports included),
+then the first GET /countries/image (no database) and the first GET /status
+(first database checkout). Results are printed as JSON.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+boot_ms = (time.perf_counter() - start) * 1000
+
+client = app.test_client()
+result = {"boot_ms": boot_ms}
+for label, path in (("image", "/countries/image"), ("status", "/status")):
+    start = time.perf_counter()
+    response = client.get(path)
+    result[f"first_{label}_ms"] = (time.perf_counter() - start) * 1000
+    result[f"first_{label}_status"] = response.status_code
+print("RESULT " + json.dumps(result))
+"""
+
+
+def run_once():
+    """Run the probe in a fresh interpreter and return its measurements"""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    line = next(line for line in output.splitlines() if line.startswith('RESULT '))
+    return json.loads(line[len('RESULT '):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    
+    runs = [run_once() for _ in range(args.runs)]
+    summary = {"runs": args.runs}
+    for key in ("boot_ms", "first_image_ms", "first_status_ms"):
+        values = [run[key] for run in runs]
+        summary[key] = {
+            "median": round(statistics.median(values), 2),
+            "min": round(min(values), 2),
+            "max": round(max(values), 2)
+        }
+    summary["first_image_status"] = runs[-1]["first_image_status"]
+    summary["first_status_status"] = runs[-1]["first_status_status"]
+    
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Tracing overhead benchmark: cost of the profiling hooks, on and off.
+
+Micro-benchmarks a bare span and a query through the cursor wrapper
+(against a stand-in cursor, so only the wrapper's own cost - including the
+existing latency metric - is measured), with tracing disabled and enabled,
+next to calling the cursor directly. Then
+serves GET /countries/<name>, /countries?limit=20 and /status from a
+synthetic dataset file through the Flask test client with the request
+hooks stubbed out (baseline), tracing disabled (the default) and tracing
+enabled with spans kept but no slow-request log lines.
+
+Needs no database. Every file the app keeps under cache/ goes to a
+temporary directory.
+
+Usage:
+    python -m benchmarks.bench_tracing [--size 5000] [--requests 5000]
+        [--calls 200000] [--output bench_tracing.json]
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from app.config import Config
+from benchmarks.bench_load import use_work_dir
+
+
+class StandInCursor:
+    """Does nothing, so timings show only the wrapper around it"""
+
+    rowcount = 1
+
+    def execute(self, query, params=None):
+        return None
+
+    def fetchall(self):
+        return [()]
+
+
+def per_call_ns(fn, calls):
+    """Median over 5 runs of the time per call, in nanoseconds"""
+    runs = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        runs.append((time.perf_counter() - start) / calls * 1e9)
+    return round(statistics.median(runs), 1)
+
+
+def micro(calls):
+    """ns per call for the hooks with tracing off and on"""
+    from app.database import _TimedCursor
+    from app.profiling import tracer
+
+    raw = StandInCursor()
+    wrapped = _TimedCursor(StandInCursor())
+    query = "SELECT * FROM countries WHERE name = %s"
+
+    def bare_span():
+        with tracer.span('db', query):
+            pass
+
+    def wrapped_query():
+        wrapped.execute(query, ('x',))
+        wrapped.fetchall()
+
+    def raw_query():
+        raw.execute(query, ('x',))
+        raw.fetchall()
+
+    result = {"raw_cursor_ns": per_call_ns(raw_query, calls)}
+    for label, enabled in (('disabled', False), ('enabled', True)):
+        Config.TRACE_ENABLED = enabled
+        tracer.begin()
+        result[label] = {
+            "span_ns": per_call_ns(bare_span, calls),
+            # Past TRACE_MAX_SPANS spans are timed but dropped, as in a request
+            "cursor_ns": per_call_ns(wrapped_query, calls)
+        }
+        tracer.end('GET', '/', '/', 200, 0)
+    return result
+
+
+def publish_dataset(size, path):
+    """Write a synthetic dataset file, as a refresh would"""
+    from app.dataset import write_dataset
+    from app.summary import build_summary
+    from benchmarks.bench_processing import synthetic_countries
+
+    refreshed_at = datetime(2025, 10, 22, 18, 0, 0)
+    rows = [
+        {
+            "id": i,
+            "name": country['name'],
+            "capital": country['capital'],
+            "region": country['region'],
+            "population": country['population'],
+            "currency_code": 'NGN',
+            "exchange_rate": Decimal('1600.230000'),
+            "estimated_gdp": Decimal(country['population']) * 1500 / Decimal('1600.23'),
+            "flag_url": country['flag'],
+            "last_refreshed_at": refreshed_at
+        }
+        for i, country in enumerate(synthetic_countries(size), 1)
+    ]
+    ids = [row['id'] for row in rows]
+    orders = {sort: ids for sort in ('name_asc', 'gdp_desc', 'gdp_asc', 'population_desc')}
+    write_dataset(path, rows, (refreshed_at, 0), orders, build_summary(rows, Config.SUMMARY_TOP_N), 1)
+    return [row['name'] for row in rows]
+
+
+def end_to_end(client, paths, total):
+    """Latency percentiles over total requests cycling through paths"""
+    latencies = []
+    for i in range(total):
+        start = time.perf_counter()
+        client.get(paths[i % len(paths)])
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    return {
+        "mean_us": round(statistics.fmean(latencies), 1),
+        "p50_us": round(latencies[len(latencies) // 2], 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)], 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--output', default='bench_tracing.json')
+    args = parser.parse_args()
+
+    use_work_dir(tempfile.mkdtemp(prefix='bench-tracing-'))
+    Config.DB_CONFIG['pool_warmup'] = 0
+    names = publish_dataset(args.size, Config.DATASET_PATH)
+
+    from app import create_app
+    from app.profiling import tracer
+    client = create_app().test_client()
+    paths = [f"/countries/{name}" for name in random.Random(0).sample(names, min(len(names), 200))]
+    paths += ['/countries?limit=20', '/status']
+
+    report = {"size": args.size, "requests": args.requests, "micro": micro(args.calls), "requests_us": {}}
+
+    begin, end = tracer.begin, tracer.end
+    modes = (
+        ('baseline', False, lambda: None, lambda *args: None),
+        ('disabled', False, begin, end),
+        ('enabled', True, begin, end)
+    )
+    # Spans are kept and the slow check runs, but nothing is slow enough to print
+    Config.SLOW_REQUEST_MS = 60000
+    for label, enabled, begin_hook, end_hook in modes:
+        Config.TRACE_ENABLED = enabled
+        tracer.begin, tracer.end = begin_hook, end_hook
+        end_to_end(client, paths, min(500, args.requests))
+        report["requests_us"][label] = end_to_end(client, paths, args.requests)
+    tracer.begin, tracer.end = begin, end
+    Config.TRACE_ENABLED = False
+
+    micro_result = report["micro"]
+    print(f"cursor: raw={micro_result['raw_cursor_ns']}ns disabled={micro_result['disabled']['cursor_ns']}ns "
+          f"enabled={micro_result['enabled']['cursor_ns']}ns")
+    for label, timings in report["requests_us"].items():
+        print(f"{label:8} mean={timings['mean_us']}us p50={timings['p50_us']}us p99={timings['p99_us']}us")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
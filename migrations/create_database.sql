@@ -0,0 +1,6 @@
+-- Create database if not exists
+CREATE DATABASE IF NOT EXISTS country_currency_db CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+USE country_currency_db;
+
+-- Then load the tables: source migrations/schema.sql
@@ -1,13 +1,11 @@
--- Create database if not exists
-CREATE DATABASE IF NOT EXISTS country_currency_db CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
-
-USE country_currency_db;
-
--- Drop table if exists (for clean setup)
-DROP TABLE IF EXISTS countries;
+-- Single source of the table definitions. Applied by POST /init-db and safe to
+-- run repeatedly; migrations/upgrades.sql brings older databases up to date.
+--
+-- Text columns use a case-insensitive collation, so lookups like
+-- name = 'nigeria' match 'Nigeria' and still use the indexes below.
 
 -- Create countries table
-CREATE TABLE countries (
+CREATE TABLE IF NOT EXISTS countries (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(255) NOT NULL UNIQUE,
     capital VARCHAR(255),
@@ -19,18 +17,54 @@ CREATE TABLE countries (
     flag_url TEXT,
     last_refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     
-    INDEX idx_name (name),
-    INDEX idx_region (region),
-    INDEX idx_currency (currency_code)
+    -- Filter + sort combinations served by GET /countries
+    INDEX idx_region_name (region, name),
+    INDEX idx_region_gdp (region, estimated_gdp),
+    INDEX idx_region_population (region, population),
+    INDEX idx_currency_name (currency_code, name),
+    INDEX idx_currency_gdp (currency_code, estimated_gdp),
+    INDEX idx_gdp (estimated_gdp),
+    INDEX idx_population (population)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
--- Create metadata table for tracking refresh timestamps
-DROP TABLE IF EXISTS refresh_metadata;
+-- Append-only history: one refresh_history row per refresh, and one row per
+-- currency / country in it. The primary keys cluster each series by time, so
+-- a range for one currency or country reads only its own rows.
+CREATE TABLE IF NOT EXISTS refresh_history (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    refreshed_at DATETIME NOT NULL,
+    currency_count INT NOT NULL,
+    country_count INT NOT NULL,
+    INDEX idx_refreshed_at (refreshed_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS rate_history (
+    currency_code VARCHAR(10) NOT NULL,
+    refreshed_at DATETIME NOT NULL,
+    refresh_id INT NOT NULL,
+    rate DECIMAL(24, 8) NOT NULL,
+    PRIMARY KEY (currency_code, refreshed_at, refresh_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
-CREATE TABLE refresh_metadata (
+CREATE TABLE IF NOT EXISTS gdp_history (
+    country_name VARCHAR(255) NOT NULL,
+    refreshed_at DATETIME NOT NULL,
+    refresh_id INT NOT NULL,
+    population BIGINT NOT NULL,
+    exchange_rate DECIMAL(15, 6),
+    estimated_gdp DECIMAL(20, 2),
+    PRIMARY KEY (country_name, refreshed_at, refresh_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Create metadata table for tracking refresh timestamps
+CREATE TABLE IF NOT EXISTS refresh_metadata (
     id INT AUTO_INCREMENT PRIMARY KEY,
-    last_refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    last_refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    delete_count INT NOT NULL DEFAULT 0,
+    -- Maintained in the same transaction as every write, for /status
+    country_count INT NOT NULL DEFAULT 0,
+    generation BIGINT NOT NULL DEFAULT 0
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Insert initial metadata record
-INSERT INTO refresh_metadata (id) VALUES (1);
\ No newline at end of file
+INSERT IGNORE INTO refresh_metadata (id) VALUES (1);
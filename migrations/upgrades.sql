@@ -0,0 +1,26 @@
+-- Upgrades for databases created by earlier versions of schema.sql.
+-- Applied by POST /init-db after schema.sql; "already exists" and
+-- "does not exist" errors are skipped, so every statement is re-runnable.
+
+-- refresh_metadata.delete_count versions reads for ETags
+ALTER TABLE refresh_metadata ADD COLUMN delete_count INT NOT NULL DEFAULT 0;
+
+-- refresh_metadata.country_count and generation answer /status without COUNT(*);
+-- the backfill is exact whenever it runs
+ALTER TABLE refresh_metadata ADD COLUMN country_count INT NOT NULL DEFAULT 0;
+ALTER TABLE refresh_metadata ADD COLUMN generation BIGINT NOT NULL DEFAULT 0;
+UPDATE refresh_metadata
+SET country_count = (SELECT COUNT(*) FROM countries), last_refreshed_at = last_refreshed_at
+WHERE id = 1;
+
+-- Composite indexes replacing the single-column region/currency indexes
+ALTER TABLE countries ADD INDEX idx_region_name (region, name);
+ALTER TABLE countries ADD INDEX idx_region_gdp (region, estimated_gdp);
+ALTER TABLE countries ADD INDEX idx_region_population (region, population);
+ALTER TABLE countries ADD INDEX idx_currency_name (currency_code, name);
+ALTER TABLE countries ADD INDEX idx_currency_gdp (currency_code, estimated_gdp);
+ALTER TABLE countries ADD INDEX idx_gdp (estimated_gdp);
+ALTER TABLE countries ADD INDEX idx_population (population);
+ALTER TABLE countries DROP INDEX idx_name;
+ALTER TABLE countries DROP INDEX idx_region;
+ALTER TABLE countries DROP INDEX idx_currency;
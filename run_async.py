@@ -0,0 +1,26 @@
+"""
+Async entry point: the same app served with cooperative (gevent) I/O.
+
+Sockets, locks and sleeps are patched before the app is imported, so a
+request waiting on MySQL (pure-Python driver), the connection pool or an
+upstream API yields to other requests instead of holding the worker.
+
+    gunicorn run_async:app -k gevent --worker-connections 1000 --bind 0.0.0.0:$PORT
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import os
+
+# The C extension's sockets can't be patched
+os.environ.setdefault('DB_USE_PURE', 'true')
+
+from app import create_app
+
+app = create_app()
+
+if __name__ == '__main__':
+    from gevent.pywsgi import WSGIServer
+    port = int(os.getenv('PORT', 5000))
+    print(f"Serving on 0.0.0.0:{port} (gevent)")
+    WSGIServer(('0.0.0.0', port), app, log=None).serve_forever()
@@ -0,0 +1,133 @@
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime
+from decimal import Decimal
+import mysql.connector
+import pytest
+from app import create_app
+from app.cache import response_cache, result_cache
+from app.config import BASE_DIR, Config
+from app.database import Database
+from app.dataset import CountryDataset, write_dataset
+from app.metrics import metrics
+from app.models import COUNTRY_COLUMNS, SORT_ORDERS, Country
+from app.summary import build_summary
+
+REGIONS = ('Africa', 'Americas', 'Asia', 'Europe', None)
+CURRENCIES = ('NGN', 'USD', 'EUR', 'GHS', None)
+
+
+def sample_rows(size=120, seed=7):
+    """Country rows as MySQL returns them: NULLs, GDP ties and mixed-case names included"""
+    rng = random.Random(seed)
+    refreshed_at = datetime(2025, 10, 22, 18, 0, 0)
+    rows = []
+    for row_id in range(1, size + 1):
+        name = ''.join(rng.choice('abcdefghij') for _ in range(6)) + str(row_id)
+        currency = rng.choice(CURRENCIES)
+        rows.append({
+            "id": row_id,
+            "name": name.capitalize() if rng.random() < 0.5 else name,
+            "capital": f"{name} City" if rng.random() < 0.9 else None,
+            "region": rng.choice(REGIONS),
+            "population": rng.choice([1000, 5000, rng.randint(1, 10 ** 9)]),
+            "currency_code": currency,
+            "exchange_rate": Decimal('1600.230000') if currency else None,
+            "estimated_gdp": None if rng.random() < 0.15 else Decimal(rng.choice([100, 250, rng.randint(1, 10 ** 6)])) / 4,
+            "flag_url": f"https://flagcdn.com/{row_id}.svg",
+            "last_refreshed_at": refreshed_at if rng.random() < 0.9 else None
+        })
+    return rows
+
+
+@pytest.fixture
+def database(tmp_path):
+    """
+    The rows in SQLite, standing in for MySQL: NOCASE collation and NULLs
+    sorting first ascending and last descending, as in MySQL
+    """
+    connection = sqlite3.connect(tmp_path / 'countries.db')
+    connection.execute("""
+        CREATE TABLE countries (
+            id INTEGER PRIMARY KEY, name TEXT COLLATE NOCASE, capital TEXT,
+            region TEXT COLLATE NOCASE, population INTEGER, currency_code TEXT COLLATE NOCASE,
+            exchange_rate REAL, estimated_gdp REAL, flag_url TEXT, last_refreshed_at TEXT
+        )
+    """)
+    rows = sample_rows()
+    connection.executemany(
+        f"INSERT INTO countries (id, {', '.join(COUNTRY_COLUMNS)}) VALUES ({', '.join(['?'] * 10)})",
+        [
+            [float(value) if isinstance(value, Decimal) else value for value in
+             [row['id']] + [row[column] for column in COUNTRY_COLUMNS]]
+            for row in rows
+        ]
+    )
+    yield connection, rows
+    connection.close()
+
+
+def run_query(connection, query, params):
+    """Run a MySQL-style (%s) query on SQLite; returns the row ids"""
+    params = [float(value) if isinstance(value, Decimal) else value for value in params]
+    return [row[0] for row in connection.execute(query.replace('%s', '?').replace('SELECT *', 'SELECT id'), params)]
+
+
+def publish(connection, rows, path, version, generation):
+    """Write rows to a dataset file the way Country.publish_dataset does it"""
+    orders = {
+        sort: run_query(connection, f"SELECT id FROM countries ORDER BY {column} {direction}, id {direction}", [])
+        for sort, (column, direction) in SORT_ORDERS.items()
+    }
+    write_dataset(str(path), rows, version, orders, build_summary(rows, 5), generation)
+
+
+@pytest.fixture
+def dataset(tmp_path, database):
+    """The rows published as generation 11"""
+    connection, rows = database
+    path = tmp_path / 'countries.dataset'
+    publish(connection, rows, path, (rows[0]['last_refreshed_at'], 3), 11)
+    return CountryDataset(str(path))
+
+
+def prime_metadata(version, generation):
+    """Memoize a refresh_metadata read, as Country._get_metadata stores one"""
+    Country._version_cache.update(
+        value={"version": version, "generation": generation}, error=None, read_at=time.monotonic()
+    )
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, dataset):
+    """
+    The app serving the dataset fixture. Every cache/ path is under
+    tmp_path, refresh_metadata is memoized to match the file, and MySQL is
+    unreachable, so anything that needs a query fails like a database outage.
+    """
+    cache_dir = os.path.join(BASE_DIR, 'cache')
+    for name, value in list(vars(Config).items()):
+        if name.isupper() and isinstance(value, str) and value.startswith(cache_dir + os.sep):
+            monkeypatch.setattr(Config, name, os.path.join(tmp_path, os.path.relpath(value, cache_dir)))
+    monkeypatch.setattr(Config, 'DATASET_PATH', str(tmp_path / 'countries.dataset'))
+    monkeypatch.setattr(Config, 'DATA_VERSION_TTL', 3600)
+    monkeypatch.setitem(Config.DB_CONFIG, 'pool_warmup', 0)
+
+    def unreachable(cls):
+        raise mysql.connector.errors.InterfaceError("Can't connect to MySQL server (tests)")
+
+    monkeypatch.setattr(Database, '_connect', classmethod(unreachable))
+    monkeypatch.setattr(metrics, 'start_flusher', lambda: None)
+    monkeypatch.setattr(Country, '_version_cache', {'value': None, 'error': None, 'read_at': 0})
+    for cache in (result_cache, response_cache):
+        cache.__init__(cache.max_size, cache.ttl)
+
+    prime_metadata(dataset.version, dataset.generation)
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
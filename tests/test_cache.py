@@ -0,0 +1,110 @@
+from app.cache import ResultCache, result_cache, response_cache
+from app.models import Country
+from tests.conftest import prime_metadata, publish
+
+
+class Loader:
+    """Counts calls, returning the call number"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+def test_hits_and_misses():
+    cache = ResultCache(max_size=4, ttl=60)
+    load = Loader()
+    assert cache.get_or_load('a', load) == 1
+    assert cache.get_or_load('a', load) == 1
+    assert cache.get_or_load('b', load) == 2
+    assert cache.stats() == {
+        "generation": 0, "size": 2, "max_size": 4, "hits": 1, "misses": 2, "evictions": 0
+    }
+
+
+def test_bump_generation_invalidates():
+    cache = ResultCache(max_size=4, ttl=60)
+    load = Loader()
+    cache.get_or_load('a', load)
+    assert cache.bump_generation() == 1
+    assert cache.get_or_load('a', load) == 2
+    assert cache.stats()["size"] == 1
+
+
+def test_expired_entries_reload():
+    cache = ResultCache(max_size=4, ttl=0)
+    load = Loader()
+    cache.get_or_load('a', load)
+    assert cache.get_or_load('a', load) == 2
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResultCache(max_size=2, ttl=60)
+    load = Loader()
+    cache.get_or_load('a', load)
+    cache.get_or_load('b', load)
+    cache.get_or_load('a', load)
+    cache.get_or_load('c', load)
+    assert cache.stats()["evictions"] == 1
+    assert cache.get_or_load('a', load) == 1
+    assert cache.get_or_load('b', load) == 4
+
+
+def test_result_loaded_across_a_write_is_not_stored():
+    cache = ResultCache(max_size=4, ttl=60)
+
+    def load():
+        # A write lands while the query runs
+        cache.bump_generation()
+        return 'stale'
+
+    assert cache.get_or_load('a', load) == 'stale'
+    assert cache.stats()["size"] == 0
+
+
+def test_observe_version_invalidates_on_change():
+    cache = ResultCache(max_size=4, ttl=60)
+    load = Loader()
+    cache.observe_version(('2025-10-22', 0))
+    cache.get_or_load('a', load)
+    cache.observe_version(('2025-10-22', 0))
+    assert cache.get_or_load('a', load) == 1
+    cache.observe_version(('2025-10-22', 1))
+    assert cache.get_or_load('a', load) == 2
+
+
+def test_country_reads_are_cached(app, database):
+    _, rows = database
+    with app.app_context():
+        assert Country.get_by_name(rows[0]['name'].upper()) == rows[0]
+        assert Country.get_by_name(rows[0]['name'].lower()) == rows[0]
+        assert Country.get_all(region='AFRICA') is Country.get_all(region='africa')
+    assert result_cache.stats()["hits"] == 2
+
+
+def test_responses_are_cached(client, database):
+    _, rows = database
+    path = f"/countries/{rows[0]['name']}"
+    first = client.get(path)
+    second = client.get(path)
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
+    assert response_cache.stats()["hits"] == 1
+    assert client.get('/cache/stats').get_json()["responses"]["hits"] == 1
+
+
+def test_new_data_version_invalidates(app, database, tmp_path):
+    connection, rows = database
+    with app.app_context():
+        before = Country.get_all()
+        assert Country.get_all() is before
+
+        # Another worker refreshed: a new file and a new generation
+        changed = [{**row, "population": row['population'] + 1} for row in rows]
+        publish(connection, changed, tmp_path / 'countries.dataset', (rows[0]['last_refreshed_at'], 4), 12)
+        prime_metadata((rows[0]['last_refreshed_at'], 4), 12)
+        Country.get_data_version()
+        assert sorted(Country.get_all(), key=lambda row: row['id']) == changed
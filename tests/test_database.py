@@ -0,0 +1,111 @@
+import threading
+import time
+import mysql.connector
+import pytest
+from mysql.connector.errors import PoolError
+from app.config import Config
+from app.database import Database
+
+
+class StandInConnection:
+    """Records pings and closes; breaks on request"""
+
+    def __init__(self, number):
+        self.number = number
+        self.connected = True
+        self.ping_fails = False
+        self.closed = False
+
+    def is_connected(self):
+        return self.connected
+
+    def ping(self, reconnect=False):
+        if self.ping_fails:
+            raise mysql.connector.errors.OperationalError("MySQL server has gone away")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """An empty pool of 2 whose connections are stand-ins; returns the ones opened"""
+    monkeypatch.setattr(Database, '_pool', None)
+    monkeypatch.setattr(Database, '_created', 0)
+    monkeypatch.setitem(Config.DB_CONFIG, 'pool_size', 2)
+    monkeypatch.setitem(Config.DB_CONFIG, 'pool_warmup', 0)
+    monkeypatch.setitem(Config.DB_CONFIG, 'pool_timeout', 5)
+    monkeypatch.setitem(Config.DB_CONFIG, 'ping_after', 30)
+    opened = []
+
+    def connect(cls):
+        opened.append(StandInConnection(len(opened)))
+        return opened[-1]
+
+    monkeypatch.setattr(Database, '_connect', classmethod(connect))
+    Database.initialize_pool()
+    return opened
+
+
+def test_pool_opens_connections_on_first_use(pool):
+    assert pool == []
+    connection = Database._acquire()
+    assert pool == [connection]
+
+
+def test_returned_connection_is_reused(pool):
+    first = Database._acquire()
+    Database._return(first)
+    assert Database._acquire() is first
+    assert len(pool) == 1
+
+
+def test_exhausted_pool_times_out(pool, monkeypatch):
+    monkeypatch.setitem(Config.DB_CONFIG, 'pool_timeout', 0.1)
+    Database._acquire()
+    Database._acquire()
+    started = time.monotonic()
+    with pytest.raises(PoolError):
+        Database._acquire()
+    assert 0.1 <= time.monotonic() - started < 1
+
+
+def test_waiter_gets_a_returned_connection(pool):
+    first = Database._acquire()
+    Database._acquire()
+    threading.Timer(0.1, Database._return, [first]).start()
+    assert Database._acquire() is first
+
+
+def test_discarded_connection_frees_a_slot_for_a_waiter(pool):
+    first = Database._acquire()
+    Database._acquire()
+    # A broken connection is closed on return, putting nothing back on the queue
+    first.connected = False
+    threading.Timer(0.1, Database._return, [first]).start()
+
+    started = time.monotonic()
+    connection = Database._acquire()
+    assert time.monotonic() - started < 1
+    assert first.closed and connection is pool[2]
+
+
+def test_stale_idle_connection_is_replaced(pool, monkeypatch):
+    monkeypatch.setitem(Config.DB_CONFIG, 'ping_after', 0)
+    first = Database._acquire()
+    Database._return(first)
+    first.ping_fails = True
+    connection = Database._acquire()
+    assert first.closed and connection is pool[1]
+    assert Database._created == 1
+
+
+def test_failed_connect_gives_its_slot_back(pool, monkeypatch):
+    def refuse(cls):
+        raise mysql.connector.errors.InterfaceError("Can't connect to MySQL server")
+
+    monkeypatch.setattr(Database, '_connect', classmethod(refuse))
+    for _ in range(3):
+        with pytest.raises(mysql.connector.Error):
+            Database._acquire()
+    assert Database._created == 0
@@ -0,0 +1,61 @@
+import gzip
+import json
+import pytest
+from tests.conftest import prime_metadata, publish
+
+PATHS = ['/status', '/stats', '/stats/regions', '/countries', '/countries?limit=5&sort=gdp_desc']
+
+
+def etag_of(response):
+    return response.headers['ETag'].strip('"')
+
+
+@pytest.mark.parametrize('path', PATHS)
+def test_matching_etag_gets_304(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    cached = client.get(path, headers={'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == response.headers['ETag']
+
+
+def test_etag_covers_the_request(client, database):
+    _, rows = database
+    name = rows[0]['name']
+    tags = {
+        etag_of(client.get(path))
+        for path in (f"/countries/{name}", '/countries', '/countries?region=Africa', '/stats/currencies')
+    }
+    assert len(tags) == 4
+    # Names match case-insensitively, and so do their ETags
+    assert etag_of(client.get(f"/countries/{name.upper()}")) == etag_of(client.get(f"/countries/{name.lower()}"))
+
+
+def test_compressed_variant_has_its_own_etag(client):
+    response = client.get('/countries', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert etag_of(response) == etag_of(client.get('/countries')) + '-gzip'
+    assert json.loads(gzip.decompress(response.data)) == client.get('/countries').get_json()
+
+    cached = client.get('/countries', headers={'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+
+
+def test_new_data_version_changes_the_etag(client, database, tmp_path):
+    connection, rows = database
+    old = client.get('/countries').headers['ETag']
+
+    version = (rows[0]['last_refreshed_at'], 4)
+    changed = [{**row, "capital": 'Renamed'} for row in rows]
+    publish(connection, changed, tmp_path / 'countries.dataset', version, 12)
+    prime_metadata(version, 12)
+
+    response = client.get('/countries', headers={'If-None-Match': old})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != old
+    assert {row['capital'] for row in response.get_json()} == {'Renamed'}
+
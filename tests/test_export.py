@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import os
+from decimal import Decimal
+import numpy as np
+import pytest
+from app.config import Config
+from app.services.exchange_service import ExchangeService
+from tests.conftest import prime_metadata, publish
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def by_id(rows):
+    return sorted(rows, key=lambda row: row['id'])
+
+
+def test_csv(client, database):
+    _, rows = database
+    response = client.get('/export/countries.csv')
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment; filename=countries.csv'
+    exported = by_id(csv.DictReader(io.StringIO(response.data.decode('utf-8'))))
+    assert len(exported) == len(rows)
+    first, row = exported[0], rows[0]
+    assert first['name'] == row['name'] and int(first['population']) == row['population']
+    assert first['capital'] == (row['capital'] or '')
+    assert first['exchange_rate'] == ('' if row['exchange_rate'] is None else str(row['exchange_rate']))
+
+
+def test_ndjson(client, database):
+    _, rows = database
+    lines = client.get('/export/countries.ndjson').data.decode('utf-8').splitlines()
+    exported = by_id(json.loads(line) for line in lines)
+    assert [row['name'] for row in exported] == [row['name'] for row in rows]
+
+
+def test_npz(client, database):
+    _, rows = database
+    columns = np.load(io.BytesIO(client.get('/export/countries.npz').data))
+    order = np.argsort(columns['id'])
+    assert columns['population'].dtype == np.int64
+    gdp = columns['estimated_gdp'][order]
+    assert [np.isnan(value) for value in gdp] == [row['estimated_gdp'] is None for row in rows]
+
+
+@pytest.mark.skipif(pyarrow is None, reason="arrow and parquet exports need pyarrow")
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet'])
+def test_columnar_formats_keep_mysql_types(client, database, fmt):
+    _, rows = database
+    data = pyarrow.BufferReader(client.get(f'/export/countries.{fmt}').data)
+    table = pyarrow.ipc.open_file(data).read_all() if fmt == 'arrow' else pyarrow.parquet.read_table(data)
+    assert table.schema.field('estimated_gdp').type == pyarrow.decimal128(20, 2)
+    assert table.schema.field('last_refreshed_at').type == pyarrow.timestamp('us')
+    exported = by_id(table.to_pylist())
+    assert [row['estimated_gdp'] for row in exported] == [
+        None if row['estimated_gdp'] is None else row['estimated_gdp'].quantize(Decimal('0.01'))
+        for row in rows
+    ]
+
+
+def test_conditional_and_range_requests(client):
+    whole = client.get('/export/countries.csv')
+    assert client.get('/export/countries.csv', headers={'If-None-Match': whole.headers['ETag']}).status_code == 304
+    part = client.get('/export/countries.csv', headers={'Range': 'bytes=10-19'})
+    assert part.status_code == 206
+    assert part.data == whole.data[10:20]
+
+
+def test_export_is_rewritten_for_a_new_version(client, database, tmp_path):
+    connection, rows = database
+    first = client.get('/export/countries.ndjson').headers['ETag']
+    assert len(os.listdir(Config.EXPORT_DIR)) == 1
+
+    version = (rows[0]['last_refreshed_at'], 4)
+    publish(connection, rows, tmp_path / 'countries.dataset', version, 12)
+    prime_metadata(version, 12)
+    assert client.get('/export/countries.ndjson').headers['ETag'] != first
+    # The previous version's file is gone
+    assert len(os.listdir(Config.EXPORT_DIR)) == 1
+
+
+def test_rates(client):
+    assert client.get('/export/rates.csv').status_code == 503
+    ExchangeService.publish_rate_table({'USD': 1, 'NGN': 1600.0}, as_of='2025-10-22T18:00:00Z')
+    exported = list(csv.DictReader(io.StringIO(client.get('/export/rates.csv').data.decode('utf-8'))))
+    assert exported == [{"currency_code": 'NGN', "rate": '1600.0'}, {"currency_code": 'USD', "rate": '1.0'}]
+
+
+def test_unknown_tables_and_formats(client):
+    assert client.get('/export/users.csv').get_json()["tables"] == ['countries', 'rates']
+    assert client.get('/export/countries.xlsx').status_code == 404
@@ -0,0 +1,56 @@
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from app.models import History
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """History.get_series answering with the points set here, recording its arguments"""
+    calls = []
+    answer = {"points": [], "truncated": False}
+
+    def get_series(series, key, start, end, bucket=None, limit=None):
+        calls.append((series, key, start, end, bucket))
+        return answer["points"], answer["truncated"]
+
+    monkeypatch.setattr(History, 'get_series', get_series)
+    return calls, answer
+
+
+def test_raw_points(client, stored):
+    calls, answer = stored
+    answer["points"] = [{"refreshed_at": datetime(2025, 10, 1, 18), "rate": 1600.23}]
+    answer["truncated"] = True
+    body = client.get('/history/rates/ngn?from=2025-10-01&to=2025-10-08').get_json()
+    assert calls == [('rates', 'NGN', datetime(2025, 10, 1), datetime(2025, 10, 8), None)]
+    assert body == {
+        "series": 'rates',
+        "key": 'NGN',
+        "from": '2025-10-01T00:00:00Z',
+        "to": '2025-10-08T00:00:00Z',
+        "bucket": 'raw',
+        "points": [{"t": '2025-10-01T18:00:00Z', "rate": 1600.23}],
+        "truncated": True
+    }
+
+
+def test_bucketed_points(client, stored):
+    calls, answer = stored
+    answer["points"] = [
+        {"bucket": date(2025, 10, 1), "avg": Decimal('10.5'), "min": 10, "max": 11, "last": '11', "samples": 2},
+        {"bucket": '2025-10-02 00:00:00', "avg": 12, "min": 12, "max": 12, "last": '12', "samples": 1}
+    ]
+    body = client.get('/history/gdp/Nigeria?from=2025-10-01&to=2025-10-08&bucket=DAY').get_json()
+    assert calls[0][:2] == ('gdp', 'Nigeria') and calls[0][4] == 'day'
+    assert [point["t"] for point in body["points"]] == ['2025-10-01T00:00:00Z', '2025-10-02T00:00:00Z']
+    assert body["points"][0]["samples"] == 2
+
+
+def test_bad_parameters_are_rejected(client, stored):
+    calls, _ = stored
+    assert client.get('/history/rates/NGN?bucket=year').get_json()["details"] == {
+        "bucket": "must be one of raw, hour, day, week, month"
+    }
+    assert client.get('/history/rates/NGN?from=2025-10-08&to=2025-10-01').status_code == 400
+    assert calls == []
@@ -0,0 +1,114 @@
+import os
+import threading
+import pytest
+from app.config import Config
+from app.services import job_service
+from app.services.job_service import JobService
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    """Refresh jobs under tmp_path, running a stand-in refresh until released"""
+    monkeypatch.setattr(Config, 'JOBS_DIR', str(tmp_path / 'jobs'))
+    release = threading.Event()
+    outcome = {"error": None}
+
+    def fetch_and_refresh(force=False, offline=False, progress=None):
+        progress('fetch')
+        release.wait(10)
+        if outcome["error"]:
+            raise Exception(outcome["error"])
+        return {"unchanged": False, "count": 3, "force": force}
+
+    monkeypatch.setattr(job_service.CountryService, 'fetch_and_refresh', fetch_and_refresh)
+    yield release, outcome
+    # Let a job a failed test left running finish before the next one starts
+    release.set()
+    JobService._get_executor().submit(lambda: None).result(10)
+
+
+def test_job_runs_to_completion(jobs):
+    release, _ = jobs
+    job, joined = JobService.start_refresh(force=True)
+    assert not joined
+    release.set()
+    job = JobService.wait(job['id'], timeout=10, interval=0.01)
+    assert job['status'] == 'succeeded'
+    assert job['result'] == {"unchanged": False, "count": 3, "force": True}
+    assert job['phase'] is None and job['finished_at']
+
+
+def test_concurrent_refreshes_join_the_running_job(jobs):
+    release, _ = jobs
+    first, _ = JobService.start_refresh()
+    second, joined = JobService.start_refresh()
+    assert joined and second['id'] == first['id']
+    release.set()
+    assert JobService.wait(first['id'], timeout=10, interval=0.01)['status'] == 'succeeded'
+    # Once finished, the next refresh is a new job
+    third, joined = JobService.start_refresh()
+    assert not joined and third['id'] != first['id']
+
+
+def test_failed_job_records_the_error(jobs):
+    release, outcome = jobs
+    outcome["error"] = "Could not fetch data from REST Countries API: timeout"
+    job, _ = JobService.start_refresh()
+    release.set()
+    job = JobService.wait(job['id'], timeout=10, interval=0.01)
+    assert job['status'] == 'failed'
+    assert job['error'] == outcome["error"]
+
+
+def test_wait_gives_up_after_the_timeout(jobs):
+    release, _ = jobs
+    job, _ = JobService.start_refresh()
+    assert JobService.wait(job['id'], timeout=0.05, interval=0.01)['status'] in ('queued', 'running')
+    release.set()
+
+
+def test_job_without_a_lock_holder_is_abandoned(jobs):
+    os.makedirs(Config.JOBS_DIR)
+    JobService._write({"id": "a1", "status": "running", "phase": "upsert"})
+    assert JobService.get_job('a1')['status'] == 'abandoned'
+
+
+def test_job_pruned_while_waiting_for_the_lock(jobs, monkeypatch):
+    os.makedirs(Config.JOBS_DIR)
+    JobService._write({"id": "a1", "status": "running", "phase": "upsert"})
+    lock_exclusive = job_service.lock_exclusive
+
+    def prune_then_lock(fd):
+        os.remove(JobService._path('a1.json'))
+        lock_exclusive(fd)
+
+    monkeypatch.setattr(job_service, 'lock_exclusive', prune_then_lock)
+    assert JobService.get_job('a1') is None
+
+
+@pytest.mark.parametrize('job_id', ['', '../current', 'missing'])
+def test_unknown_job_ids(jobs, job_id):
+    assert JobService.get_job(job_id) is None
+
+
+def test_refresh_route_answers_202_when_the_wait_times_out(jobs, client, monkeypatch):
+    release, _ = jobs
+    monkeypatch.setattr(Config, 'REFRESH_WAIT_TIMEOUT', 0.05)
+    response = client.post('/countries/refresh')
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+
+    release.set()
+    JobService.wait(job_id, timeout=10, interval=0.01)
+    response = client.get(f"/countries/refresh/{job_id}")
+    assert response.get_json()["status"] == 'succeeded'
+    assert response.get_json()["result"]["count"] == 3
+
+
+def test_refresh_route_waits_for_the_result(jobs, client):
+    release, _ = jobs
+    release.set()
+    response = client.post('/countries/refresh')
+    assert response.status_code == 200
+    assert response.get_json()["message"] == "Countries refreshed successfully"
+    assert client.get('/countries/refresh/0123abcd').status_code == 404
@@ -0,0 +1,22 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from flask import Flask
+from app.json_provider import JSONProvider
+
+
+def test_dumps_rows_compactly_in_row_order():
+    provider = JSONProvider(Flask(__name__))
+    row = {
+        "name": "Nigeria",
+        "exchange_rate": Decimal('1600.230000'),
+        "estimated_gdp": None,
+        "last_refreshed_at": datetime(2025, 10, 22, 18, 0, 0),
+        "as_of": date(2025, 10, 22),
+        "aware": datetime(2025, 10, 22, 19, 0, 0, tzinfo=timezone(timedelta(hours=1)))
+    }
+    assert provider.dumps(row) == (
+        '{"name":"Nigeria","exchange_rate":"1600.230000","estimated_gdp":null,'
+        '"last_refreshed_at":"2025-10-22T18:00:00Z","as_of":"2025-10-22","aware":"2025-10-22T18:00:00Z"}'
+    )
+    # Callers can still ask for other separators
+    assert provider.dumps([1, 2], separators=(', ', ': ')) == '[1, 2]'
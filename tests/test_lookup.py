@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from app.config import Config
+from app.database import Database
+from app.models import Country
+
+
+def test_lookup_from_the_dataset(client, database):
+    _, rows = database
+    ngn = sorted(
+        (row for row in rows if row['currency_code'] == 'NGN'),
+        key=lambda row: (row['name'].casefold(), row['id'])
+    )
+    names = [rows[0]['name'].upper(), rows[1]['name']]
+    response = client.post('/countries/lookup', json={"names": names, "currencies": ["ngn"], "fields": "name,id"})
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "countries": {
+            names[0]: {"name": rows[0]['name'], "id": rows[0]['id']},
+            names[1]: {"name": rows[1]['name'], "id": rows[1]['id']}
+        },
+        "missing": [],
+        "currencies": {"ngn": [{"name": row['name'], "id": row['id']} for row in ngn]}
+    }
+
+
+def test_lookup_rejects_bad_bodies(client):
+    assert client.post('/countries/lookup', data='names=x').status_code == 400
+    assert client.post('/countries/lookup', json={"names": "Nigeria"}).get_json()["details"] == {
+        "names": "must be a list of at most 500 strings"
+    }
+
+
+class MatchedRows:
+    """Cursor answering a query with the rows MySQL's collation matched"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_mysql_matches_map_back_to_inputs(monkeypatch):
+    monkeypatch.setattr(Config, 'DATASET_ENABLED', False)
+    matched = []
+
+    @contextmanager
+    def get_cursor(dictionary=True):
+        yield MatchedRows(matched)
+
+    monkeypatch.setattr(Database, 'get_cursor', get_cursor)
+
+    ivory_coast = {"id": 1, "name": "Côte d'Ivoire", "currency_code": 'XOF'}
+    aland = {"id": 2, "name": "Åland Islands", "currency_code": 'EUR'}
+    matched[:] = [ivory_coast, aland]
+    by_name, _ = Country.get_many(["Cote d'Ivoire", "ALAND ISLANDS ", "Atlantis"])
+    assert by_name == {"Cote d'Ivoire": ivory_coast, "ALAND ISLANDS ": aland, "Atlantis": None}
+
+    matched[:] = [aland, ivory_coast]
+    _, by_currency = Country.get_many(currencies=['xof', 'eur', 'usd'])
+    assert by_currency == {'xof': [ivory_coast], 'eur': [aland], 'usd': []}
@@ -0,0 +1,96 @@
+import json
+import os
+import time
+import pytest
+from app.config import Config
+from app.metrics import DEFAULT_BUCKETS, Metrics, label_text
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_DIR', str(tmp_path / 'metrics'))
+    return Metrics()
+
+
+def other_worker(name, counters=(), histograms=(), age=0):
+    """Write a snapshot file as another worker's flush would"""
+    path = os.path.join(Config.METRICS_DIR, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"counters": list(counters), "histograms": list(histograms)}, f)
+    if age:
+        os.utime(path, (time.time() - age, time.time() - age))
+    return path
+
+
+def test_histogram_buckets():
+    registry = Metrics()
+    for value in (0.0005, 0.003, 0.003, 100):
+        registry.observe('db_query_duration_seconds', value, kind='select')
+    [[name, labels, values]] = registry.snapshot()["histograms"]
+    assert (name, labels) == ('db_query_duration_seconds', {"kind": 'select'})
+    assert values[0] == 1 and values[DEFAULT_BUCKETS.index(0.005)] == 2
+    # Past the last bucket only the sum and count see it
+    assert sum(values[:-2]) == 3 and values[-1] == 4
+    assert values[-2] == pytest.approx(100.0065)
+
+
+def test_label_text_escapes():
+    assert label_text([]) == ""
+    assert label_text([('path', 'a"b\\c\n')], [('le', 0.5)]) == '{path="a\\"b\\\\c\\n",le="0.5"}'
+
+
+def test_collect_sums_workers(registry):
+    registry.inc('refresh_total', outcome='succeeded')
+    registry.observe('db_pool_wait_seconds', 0.002)
+    registry.flush()
+    other_worker(
+        '1-1.json',
+        counters=[['refresh_total', {"outcome": 'succeeded'}, 2]],
+        histograms=[['db_pool_wait_seconds', {}, registry.snapshot()["histograms"][0][2]]]
+    )
+    counters, histograms = registry.collect()
+    assert counters[('refresh_total', (('outcome', 'succeeded'),))] == 3
+    assert histograms[('db_pool_wait_seconds', ())][-1] == 2
+
+
+def test_collect_skips_expired_and_unreadable_snapshots(registry, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_RETENTION', 60)
+    registry.flush()
+    expired = other_worker('1-1.json', counters=[['refresh_total', {}, 5]], age=120)
+    with open(os.path.join(Config.METRICS_DIR, '3-3.json'), 'w', encoding='utf-8') as f:
+        f.write('{"count')
+
+    counters, _ = registry.collect()
+    assert counters == {}
+    assert not os.path.exists(expired)
+
+
+def test_collect_tolerates_snapshots_removed_by_another_worker(registry, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_RETENTION', 60)
+    registry.flush()
+    other_worker('1-1.json', counters=[['refresh_total', {}, 5]], age=120)
+
+    def already_removed(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, 'remove', already_removed)
+    assert registry.collect() == ({}, {})
+
+
+def test_render_exposition_format(registry):
+    registry.inc('db_pool_exhausted_total')
+    registry.observe('http_request_duration_seconds', 0.02, endpoint='/status', method='GET', status='200')
+    text = registry.render()
+    assert "# TYPE db_pool_exhausted_total counter\ndb_pool_exhausted_total 1\n" in text
+    labels = 'endpoint="/status",method="GET",status="200"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.01"}} 0\n' in text
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.025"}} 1\n' in text
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1\n' in text
+    assert f'http_request_duration_seconds_count{{{labels}}} 1\n' in text
+
+
+def test_metrics_endpoint(client):
+    client.get('/status')
+    response = client.get('/metrics')
+    assert response.mimetype == 'text/plain'
+    assert 'http_request_duration_seconds_count{endpoint="/status",method="GET",status="200"}' in response.text
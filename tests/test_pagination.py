@@ -0,0 +1,54 @@
+import pytest
+from app.models import Country
+from app.utils.validators import ValidationError
+
+
+def pages(client, query):
+    """Follow next_cursor from the first page to the last"""
+    response = client.get(f"/countries?{query}")
+    while True:
+        assert response.status_code == 200
+        body = response.get_json()
+        yield body["data"]
+        if body["next_cursor"] is None:
+            return
+        response = client.get(f"/countries?{query}&cursor={body['next_cursor']}")
+
+
+@pytest.mark.parametrize('sort', ['name_asc', 'gdp_desc', 'gdp_asc', 'population_desc'])
+def test_pages_cover_the_list_once(client, sort):
+    everything = [row['name'] for row in client.get(f"/countries?sort={sort}").get_json()]
+    paged = [row['name'] for page in pages(client, f"sort={sort}&limit=7") for row in page]
+    assert paged == everything
+
+
+def test_fields_project_rows(client):
+    page = next(pages(client, "limit=3&fields=name,region"))
+    assert len(page) == 3
+    assert all(set(row) == {'name', 'region'} for row in page)
+
+
+def test_bad_parameters_are_rejected(client):
+    cursor = Country.encode_cursor('gdp_desc', '1.5', 1)
+    assert client.get(f"/countries?sort=name_asc&limit=5&cursor={cursor}").get_json()["details"] == {
+        "cursor": "does not match sort order"
+    }
+    assert client.get("/countries?limit=0").status_code == 400
+    assert client.get("/countries?fields=password").status_code == 400
+
+
+@pytest.mark.parametrize('cursor, sort, problem', [
+    ('not-base64!', 'name_asc', "is invalid"),
+    (Country.encode_cursor('bogus', 'x', 1), 'name_asc', "is invalid"),
+    (Country.encode_cursor('gdp_desc', 'abc', 1), 'gdp_desc', "is invalid"),
+    (Country.encode_cursor('gdp_desc', '1.5', 1), 'name_asc', "does not match sort order")
+])
+def test_decode_cursor_rejects(cursor, sort, problem):
+    with pytest.raises(ValidationError) as error:
+        Country.decode_cursor(cursor, sort)
+    assert error.value.details == {"cursor": problem}
+
+
+def test_cursor_round_trips_null_values():
+    cursor = Country.encode_cursor('gdp_desc', None, 42)
+    assert Country.decode_cursor(cursor, 'gdp_desc') == (None, 42)
@@ -0,0 +1,58 @@
+"""
+Query-plan regression check: EXPLAIN the hot country queries and fail if
+any of them falls back to a full table scan.
+
+Runs against the database configured by DB_*, which must have been
+refreshed (the optimizer may prefer a scan on a nearly empty table);
+skipped when there is no such database.
+"""
+import mysql.connector
+import pytest
+from app.database import Database
+from app.models import Country, SORT_ORDERS
+
+
+def hot_queries():
+    """(label, SQL, params) for every filtered read and write by name"""
+    queries = [
+        ("get_by_name", "SELECT * FROM countries WHERE name = %s", ("nigeria",)),
+        ("delete_by_name", "DELETE FROM countries WHERE name = %s", ("nigeria",)),
+    ]
+
+    for sort in SORT_ORDERS:
+        for label, region, currency in (
+            ("region", "africa", None),
+            ("currency", None, "ngn"),
+            ("region+currency", "africa", "ngn"),
+        ):
+            query, params = Country._build_query(region, currency, sort)
+            queries.append((f"get_all {label} {sort}", query, params))
+
+        # One page without filters must also avoid scanning the table
+        query, params = Country._build_query(None, None, sort, limit=50)
+        queries.append((f"get_page {sort}", query, params))
+
+    return queries
+
+
+@pytest.fixture(scope='module')
+def refreshed_database():
+    """Skip unless DB_* points at a database with refreshed countries"""
+    try:
+        with Database.get_cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS count FROM countries")
+            count = cursor.fetchone()['count']
+    except mysql.connector.Error as e:
+        pytest.skip(f"No database: {e}")
+    if count == 0:
+        pytest.skip("The countries table is empty; refresh before checking plans")
+
+
+@pytest.mark.parametrize('label, query, params', hot_queries(), ids=[label for label, _, _ in hot_queries()])
+def test_no_full_table_scan(refreshed_database, label, query, params):
+    with Database.get_cursor() as cursor:
+        cursor.execute("EXPLAIN " + query, params)
+        plan = cursor.fetchall()
+    scans = [row for row in plan if row['table'] == 'countries' and row['type'] == 'ALL']
+    keys = ", ".join(str(row['key']) for row in plan if row['table'] == 'countries')
+    assert not scans, f"{label} falls back to a full scan (key={keys})"
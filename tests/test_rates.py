@@ -0,0 +1,52 @@
+import pytest
+from app.services.exchange_service import ExchangeService, RateTable
+from app.utils.validators import ValidationError
+
+RATES = {'USD': 1, 'ngn': 1600.0, 'EUR': 0.8, 'BAD': 0, 'NAN': float('nan'), 'TXT': 'x'}
+
+
+def test_build_skips_unusable_rates():
+    table = RateTable.build(RATES, as_of='2025-10-22T18:00:00Z')
+    assert table.codes == ['EUR', 'NGN', 'USD']
+    assert table.as_of == '2025-10-22T18:00:00Z'
+
+
+def test_convert():
+    table = RateTable.build({'USD': 1, 'NGN': 1600.0, 'EUR': 0.8})
+    rates, results = table.convert(['USD', 'EUR', 'NGN', 'EUR'], ['NGN', 'NGN', 'USD', 'EUR'], [2, 1, 800, 5])
+    assert rates == pytest.approx([1600.0, 2000.0, 1 / 1600, 1.0])
+    assert results == pytest.approx([3200.0, 2000.0, 0.5, 5.0])
+
+
+def test_convert_names_unknown_codes():
+    table = RateTable.build({'USD': 1, 'NGN': 1600.0})
+    with pytest.raises(ValidationError) as error:
+        table.convert(['USD', 'XXX', 'NGN'], ['NGN', 'USD', 'YYY'], [1, 1, 1])
+    assert error.value.details == {"1.from": "unknown currency 'XXX'", "2.to": "unknown currency 'YYY'"}
+
+
+def test_save_and_load(tmp_path):
+    table = RateTable.build({'USD': 1, 'NGN': 1600.0}, as_of='2025-10-22T18:00:00Z')
+    path = str(tmp_path / 'rates.npz')
+    table.save(path)
+    loaded = RateTable.load(path)
+    assert loaded.codes == table.codes
+    assert loaded.as_of == table.as_of
+    assert (loaded.matrix == table.matrix).all()
+
+
+def test_convert_routes(client):
+    assert client.get('/convert?from=USD&to=NGN').status_code == 503
+
+    ExchangeService.publish_rate_table({'USD': 1, 'NGN': 1600.0, 'EUR': 0.8}, as_of='2025-10-22T18:00:00Z')
+    body = client.get('/convert?from=eur&to=NGN&amount=2').get_json()
+    assert body["rates_as_of"] == '2025-10-22T18:00:00Z'
+    assert (body["from"], body["to"]) == ('EUR', 'NGN')
+    assert body["result"] == pytest.approx(4000.0)
+
+    body = client.post('/convert', json={"from": "USD", "conversions": [{"to": "NGN"}, {"to": "EUR", "amount": 10}]})
+    assert [result["result"] for result in body.get_json()["results"]] == pytest.approx([1600.0, 8.0])
+
+    response = client.post('/convert', json={"conversions": [{"from": "USD", "to": "XXX"}]})
+    assert response.status_code == 400
+    assert response.get_json()["details"] == {"0.to": "unknown currency 'XXX'"}
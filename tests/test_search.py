@@ -0,0 +1,101 @@
+import mysql.connector
+import pytest
+from app.database import Database
+from app.dataset import CountryDataset, write_dataset
+from app.models import Country
+from app.search import SearchIndex, _edit_distance, normalize
+
+
+@pytest.fixture
+def index(tmp_path):
+    names = [
+        ('Nigeria', 'Abuja'), ('Niger', 'Niamey'), ('United Kingdom', 'London'),
+        ('United States', 'Washington, D.C.'), ('Côte d\'Ivoire', 'Yamoussoukro'), ('Ghana', 'Accra')
+    ]
+    rows = [
+        {
+            "id": row_id, "name": name, "capital": capital, "region": 'Africa', "population": 1,
+            "currency_code": None, "exchange_rate": None, "estimated_gdp": None, "flag_url": None,
+            "last_refreshed_at": None
+        }
+        for row_id, (name, capital) in enumerate(names, 1)
+    ]
+    ids = [row['id'] for row in rows]
+    path = str(tmp_path / 'countries.dataset')
+    write_dataset(path, rows, (None, 0), {'name_asc': ids})
+    dataset = CountryDataset(path)
+    return SearchIndex.current(dataset)
+
+
+def results(index, query, limit=10):
+    names = index.dataset.column('name')
+    return [(names[position], kind) for position, kind in index.search(query, limit)]
+
+
+def test_normalize():
+    assert normalize("  Côte d'Ivoire ") == 'cote d ivoire'
+    assert normalize('WASHINGTON, D.C.') == 'washington d c'
+
+
+def test_edit_distance():
+    assert _edit_distance('nigeria', 'nigeria', 2) == 0
+    assert _edit_distance('nigeira', 'nigeria', 2) == 1
+    assert _edit_distance('ngieria', 'nigeria', 2) == 1
+    assert _edit_distance('abc', 'xyz', 1) == 2
+
+
+def test_ranking(index):
+    assert results(index, 'niger')[:2] == [('Niger', 'name_exact'), ('Nigeria', 'name_prefix')]
+    assert results(index, 'kingdom') == [('United Kingdom', 'name_word_prefix')]
+    assert results(index, 'acc') == [('Ghana', 'capital_prefix')]
+    assert results(index, 'cote') == [("Côte d'Ivoire", 'name_prefix')]
+
+
+def test_fuzzy(index):
+    assert results(index, 'nigeira')[0] == ('Nigeria', 'fuzzy')
+    assert results(index, 'londno') == [('United Kingdom', 'fuzzy')]
+    # Too short for typo tolerance
+    assert results(index, 'gx') == []
+
+
+def test_limit_and_empty_query(index):
+    assert len(results(index, 'united', limit=1)) == 1
+    assert results(index, ' ,. ') == []
+
+
+def test_current_follows_the_dataset(index):
+    assert SearchIndex.current(index.dataset) is index
+    assert SearchIndex.current(None) is None
+
+
+def test_search_route(client, database):
+    _, rows = database
+    name = rows[0]['name']
+    body = client.get(f"/search?q={name.upper()}&fields=name,id&limit=3").get_json()
+    assert body["query"] == name.upper()
+    assert body["results"][0] == {"name": name, "id": rows[0]['id'], "match": 'name_exact'}
+    assert len(body["results"]) <= 3
+
+
+def test_search_route_rejects_bad_parameters(client):
+    assert client.get('/search?q=%20').get_json()["details"] == {"q": "is required"}
+    assert client.get('/search?q=a&limit=51').get_json()["details"] == {"limit": "must be between 1 and 50"}
+
+
+def test_search_never_waits_on_mysql(client, database, monkeypatch):
+    _, rows = database
+    attempts = []
+
+    def unreachable(cls):
+        attempts.append(1)
+        raise mysql.connector.errors.InterfaceError("Can't connect to MySQL server")
+
+    monkeypatch.setattr(Database, '_connect', classmethod(unreachable))
+    # refresh_metadata is due to be read again
+    Country._version_cache['read_at'] = 0
+
+    first = client.get(f"/search?q={rows[0]['name']}")
+    assert first.status_code == 200
+    again = client.get(f"/search?q={rows[0]['name']}", headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert attempts == []
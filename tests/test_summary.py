@@ -0,0 +1,64 @@
+from decimal import Decimal
+from app.summary import build_summary
+
+
+def country(row_id, region, currency, population, gdp):
+    return {
+        "id": row_id, "name": f"C{row_id}", "region": region, "currency_code": currency,
+        "population": population, "estimated_gdp": None if gdp is None else Decimal(gdp)
+    }
+
+
+ROWS = [
+    country(1, 'Africa', 'NGN', 100, '30.50'),
+    country(2, 'Africa', 'NGN', 300, '10.00'),
+    country(3, 'Europe', 'EUR', 50, None),
+    country(4, None, None, 25, '30.50'),
+    country(5, 'Africa', 'GHS', 200, '20.00')
+]
+
+
+def test_totals_and_top():
+    summary = build_summary(ROWS, 2)
+    assert summary['total_countries'] == 5
+    # Ties go to the lower id; NULL GDP is left out
+    assert summary['top_by_gdp'] == [
+        {"name": "C1", "estimated_gdp": "30.50"},
+        {"name": "C4", "estimated_gdp": "30.50"}
+    ]
+
+
+def test_groups():
+    summary = build_summary(ROWS, 1)
+    assert [group['region'] for group in summary['regions']] == ['Africa', 'Europe', None]
+    africa = summary['regions'][0]
+    assert africa == {
+        "region": 'Africa',
+        "count": 3,
+        "total_population": 600,
+        "mean_population": 200.0,
+        "total_gdp": "60.50",
+        "median_gdp": "20.00",
+        "top_by_gdp": [{"name": "C1", "estimated_gdp": "30.50"}]
+    }
+    europe = summary['regions'][1]
+    assert (europe['total_gdp'], europe['median_gdp'], europe['top_by_gdp']) == ("0", None, [])
+    assert [group['currency_code'] for group in summary['currencies']] == ['EUR', 'GHS', 'NGN', None]
+    assert summary['currencies'][2]['median_gdp'] == "20.25"
+
+
+def test_empty():
+    assert build_summary([], 5) == {"total_countries": 0, "top_by_gdp": [], "regions": [], "currencies": []}
+
+
+def test_stats_routes_serve_the_dataset_summary(client, dataset):
+    assert client.get('/stats').get_json() == dataset.summary
+    regions = client.get('/stats/regions?top=1').get_json()
+    assert [group['region'] for group in regions] == [group['region'] for group in dataset.summary['regions']]
+    assert all(len(group['top_by_gdp']) <= 1 for group in regions)
+    assert client.get('/stats/currencies').get_json() == dataset.summary['currencies']
+
+
+def test_stats_routes_reject_bad_parameters(client):
+    assert client.get('/stats/capitals').status_code == 404
+    assert client.get('/stats/regions?top=0').get_json()["details"] == {"top": "must be between 1 and 10"}
@@ -0,0 +1,52 @@
+from datetime import datetime
+from decimal import Decimal
+from app.config import Config
+from app.models import Country
+from app.services.country_service import CountryService
+
+COUNTRIES = [
+    {"name": "Nigeria", "capital": "Abuja", "region": "Africa", "population": 206139589,
+     "flag": "https://flagcdn.com/ng.svg", "currencies": [{"code": "NGN"}]},
+    {"name": "Ghana", "capital": "Accra", "region": "Africa", "population": 31072940,
+     "flag": "https://flagcdn.com/gh.svg", "currencies": [{"code": "GHS"}]},
+    {"name": "Antarctica", "region": "Polar", "population": 1000, "currencies": []}
+]
+RATES = {"NGN": 1600.23, "GHS": 15.34}
+
+
+def signatures(rows):
+    return [Country._row_signature(row) for row in rows]
+
+
+def refresh(seed, population_delta=0):
+    countries = [{**country, "population": country['population'] + population_delta} for country in COUNTRIES]
+    return CountryService.process_countries(countries, RATES, datetime.utcnow(), seed=seed)
+
+
+def stored(row):
+    """A processed row as MySQL returns it: DECIMAL columns at their scale"""
+    name, capital, region, population, code, rate, gdp, flag_url, refreshed_at = row
+    return (
+        name, capital, region, population, code,
+        None if rate is None else Decimal(f"{rate:.6f}"),
+        None if gdp is None else Decimal(f"{gdp:.2f}"),
+        flag_url
+    )
+
+
+def test_default_seed_leaves_unchanged_countries_alone():
+    first, second = refresh(Config.GDP_SEED), refresh(Config.GDP_SEED)
+    assert signatures([stored(row) for row in first]) == signatures(second)
+
+
+def test_changes_are_detected():
+    before = signatures([stored(row) for row in refresh(Config.GDP_SEED)])
+    assert [a != b for a, b in zip(before, signatures(refresh(Config.GDP_SEED, population_delta=1)))] == [
+        True, True, True
+    ]
+
+
+def test_random_multipliers_change_every_row_with_a_currency():
+    before = signatures([stored(row) for row in refresh(None)])
+    after = signatures(refresh(None))
+    assert [a != b for a, b in zip(before, after)] == [True, True, False]
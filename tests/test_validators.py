@@ -0,0 +1,71 @@
+from datetime import datetime
+import pytest
+from app.utils.validators import (
+    ValidationError, parse_conversions, parse_fields, parse_limit, parse_lookup, parse_time_range
+)
+
+
+def details(call, *args, **kwargs):
+    with pytest.raises(ValidationError) as error:
+        call(*args, **kwargs)
+    return error.value.details
+
+
+def test_parse_limit():
+    assert parse_limit(None) is None
+    assert parse_limit('') is None
+    assert parse_limit('20') == 20
+    assert details(parse_limit, 'ten') == {"limit": "must be an integer"}
+    assert details(parse_limit, '0', maximum=5) == {"limit": "must be between 1 and 5"}
+    assert details(parse_limit, '6', maximum=5, name='top') == {"top": "must be between 1 and 5"}
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields(' , ') is None
+    assert parse_fields('name, region,name,') == ('name', 'region')
+    assert details(parse_fields, 'name,secret') == {"fields": "unknown field 'secret'"}
+
+
+def test_parse_conversions():
+    body = {"from": "USD", "conversions": [{"to": "NGN"}, {"from": "EUR", "to": "GBP", "amount": "2.5"}]}
+    assert parse_conversions(body) == (['USD', 'EUR'], ['NGN', 'GBP'], [1.0, 2.5])
+    assert details(parse_conversions, {"conversions": []}, maximum=3) == {
+        "conversions": "must hold between 1 and 3 entries"
+    }
+    assert details(parse_conversions, {"conversions": [{"from": "USD"}]}) == {"0.to": "is required"}
+    assert details(parse_conversions, {"conversions": [{"from": "A", "to": "B", "amount": True}]}) == {
+        "0.amount": "must be a number"
+    }
+    assert details(parse_conversions, {"conversions": [{"from": "A", "to": "B", "amount": "inf"}]}) == {
+        "0.amount": "must be a finite number"
+    }
+
+
+def test_parse_lookup():
+    body = {"names": [" Nigeria ", "Ghana", "Nigeria"], "currencies": ["NGN"], "fields": ["name", "region"]}
+    assert parse_lookup(body) == (['Nigeria', 'Ghana'], ['NGN'], ('name', 'region'))
+    assert parse_lookup({"currencies": ["NGN"], "fields": "name"}) == ([], ['NGN'], ('name',))
+    assert details(parse_lookup, []) == {"body": "must be a JSON object"}
+    assert details(parse_lookup, {"names": []}) == {"names": "names or currencies is required"}
+    assert details(parse_lookup, {"names": ["a", ""]}) == {"names": "must contain only non-empty strings"}
+    assert details(parse_lookup, {"names": ["a", "b"]}, maximum=1) == {
+        "names": "must be a list of at most 1 strings"
+    }
+
+
+@pytest.mark.parametrize('fields', [5, {"name": 1}, [1], ["name", None], True])
+def test_parse_lookup_rejects_bad_fields(fields):
+    assert list(details(parse_lookup, {"names": ["nigeria"], "fields": fields})) == ['fields']
+
+
+def test_parse_time_range():
+    assert parse_time_range('2025-10-01', '2025-10-08T12:00:00Z') == (
+        datetime(2025, 10, 1), datetime(2025, 10, 8, 12)
+    )
+    # Aware values become naive UTC
+    assert parse_time_range('2025-10-01T02:00:00+02:00', '2025-10-02')[0] == datetime(2025, 10, 1)
+    start, end = parse_time_range(None, '2025-10-08', days=7)
+    assert (start, end) == (datetime(2025, 10, 1), datetime(2025, 10, 8))
+    assert details(parse_time_range, '2025-10-08', '2025-10-01') == {"from": "must be before to"}
+    assert details(parse_time_range, 'yesterday', None) == {"from": "must be an ISO-8601 date or datetime"}